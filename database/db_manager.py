@@ -15,6 +15,10 @@ class DatabaseManager:
         """Инициализирует базу данных и создает таблицы, если их нет"""
         self.connect()
 
+        # Журнал WAL сохраняется в файле базы: чтение не блокируется записью,
+        # а фиксация транзакции дешевле
+        self.cursor.execute("PRAGMA journal_mode=WAL")
+
         # Создаем таблицы
         self.cursor.executescript('''
          -- Таблица пользователей
@@ -223,6 +227,17 @@ class DatabaseManager:
             (parent_id,)
         )
 
+    def get_subtasks_bulk(self, parent_ids):
+        """Возвращает подзадачи для нескольких групповых задач одним запросом"""
+        if not parent_ids:
+            return []
+
+        placeholders = ", ".join("?" for _ in parent_ids)
+        return self.execute(
+            f"SELECT * FROM tasks WHERE parent_id IN ({placeholders}) ORDER BY id",
+            tuple(parent_ids)
+        )
+
     def get_task(self, task_id):
         """Возвращает информацию о задаче"""
         result = self.execute("SELECT * FROM tasks WHERE id = ?", (task_id,))
@@ -260,6 +275,21 @@ class DatabaseManager:
             (task_id,)
         )
 
+    def get_dependencies_bulk(self, task_ids):
+        """Возвращает зависимости для нескольких задач одним запросом"""
+        if not task_ids:
+            return []
+
+        placeholders = ", ".join("?" for _ in task_ids)
+        return self.execute(
+            f"""SELECT d.task_id, d.predecessor_id 
+            FROM dependencies d 
+            JOIN tasks t ON d.predecessor_id = t.id 
+            WHERE d.task_id IN ({placeholders}) 
+            ORDER BY d.id""",
+            tuple(task_ids)
+        )
+
     def get_dependents(self, task_id):
         """Возвращает список задач, зависящих от указанной"""
         return self.execute(
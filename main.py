@@ -25,7 +25,7 @@ from services.jira_exporter import JiraExporter
 from services.network_model import NetworkModel
 from services.gantt_chart import GanttChart
 from services.workload_chart import WorkloadChart
-from utils.helpers import parse_csv, format_date, is_authorized, is_admin
+from utils.helpers import parse_csv, parse_iso_date, format_date, is_authorized, is_admin
 from utils.scheduler import schedule_project, update_database_assignments, simple_final_validation, \
     validate_project_schedule, validate_parallel_assignments, calculate_project_duration_unified
 
@@ -481,8 +481,9 @@ async def process_start_date(message: Message, state: FSMContext):
                 "Продолжаем работу с этой датой."
             )
 
-        # Если дата корректна, сохраняем её и предлагаем выбор типа проекта
-        await state.update_data(start_date=start_date)
+        # Если дата корректна, сохраняем её в каноническом виде (с ведущими нулями)
+        # и предлагаем выбор типа проекта
+        await state.update_data(start_date=date_obj.date().isoformat())
 
         markup = InlineKeyboardMarkup(inline_keyboard=[
             [InlineKeyboardButton(text="Использовать шаблон", callback_data="use_template")],
@@ -1004,6 +1005,21 @@ async def calculate_schedule(callback: CallbackQuery):
 
         # Выполняем расчет календарного плана с учетом выходных дней
         result = schedule_project(project, tasks, task_manager, employee_manager)
+
+        if result.get('error'):
+            # Планирование прервано из-за циклических зависимостей
+            task_names = {str(task['id']): task['name'] for task in all_tasks}
+            error_message = "❌ Расчет календарного плана невозможен: в проекте есть циклические зависимости.\n\n"
+            for cycle in result.get('cycles', [])[:3]:
+                error_message += "• " + " → ".join(task_names.get(task_id, task_id) for task_id in cycle) + "\n"
+            error_message += "\nИсправьте зависимости между задачами и повторите расчет."
+
+            markup = InlineKeyboardMarkup(inline_keyboard=[
+                [InlineKeyboardButton(text="Назад к проекту", callback_data=f"view_project_{project_id}")]
+            ])
+            await callback.message.reply(error_message, reply_markup=markup)
+            return
+
         print(f"Updating database with calculated dates for {len(result['task_dates'])} tasks...")
 
         # Дополнительный анализ по алгоритму Форда
@@ -1503,20 +1519,25 @@ def generate_planning_report(project, tasks, result, task_manager, employee_mana
 
     # Вычисляем фактическую длительность проекта
     if task_dates:
-        # Находим самую раннюю дату начала и самую позднюю дату окончания
-        start_dates = []
-        end_dates = []
+        # Находим самую раннюю дату начала и самую позднюю дату окончания за один проход,
+        # сравнивая порядковые номера дней
+        start_ordinal = None
+        end_ordinal = None
 
         for dates in task_dates.values():
             if 'start' in dates:
-                start_dates.append(datetime.datetime.strptime(dates['start'], '%Y-%m-%d'))
+                ordinal = parse_iso_date(dates['start']).toordinal()
+                if start_ordinal is None or ordinal < start_ordinal:
+                    start_ordinal = ordinal
             if 'end' in dates:
-                end_dates.append(datetime.datetime.strptime(dates['end'], '%Y-%m-%d'))
+                ordinal = parse_iso_date(dates['end']).toordinal()
+                if end_ordinal is None or ordinal > end_ordinal:
+                    end_ordinal = ordinal
 
-        if start_dates and end_dates:
-            project_start = min(start_dates)
-            project_end = max(end_dates)
-            calculated_duration = (project_end - project_start).days + 1
+        if start_ordinal is not None and end_ordinal is not None:
+            project_start = datetime.date.fromordinal(start_ordinal)
+            project_end = datetime.date.fromordinal(end_ordinal)
+            calculated_duration = end_ordinal - start_ordinal + 1
 
             text += f"Длительность проекта: {calculated_duration} дней\n"
             text += f"Дата начала: {project_start.strftime('%d.%m.%Y')}\n"
@@ -1535,7 +1556,7 @@ def generate_planning_report(project, tasks, result, task_manager, employee_mana
         try:
             # Получаем информацию о сотруднике
             employee = employee_manager.get_employee(employee_id)
-            days_off = employee.get('days_off', [])
+            days_off_mask = employee.get('days_off_mask', 0)
 
             # Преобразуем строковые даты в объекты datetime
             start_date = datetime.datetime.strptime(start_date_str, '%d.%m.%Y')
@@ -1546,12 +1567,9 @@ def generate_planning_report(project, tasks, result, task_manager, employee_mana
             days_off_dates = []
 
             while current_date <= end_date:
-                # Проверяем, является ли этот день выходным для сотрудника
-                # Дни недели в Python: 0 = понедельник, 6 = воскресенье
-                # Дни в системе: 1 = понедельник, 7 = воскресенье
-                weekday_in_system = current_date.weekday() + 1
-
-                if weekday_in_system in days_off:
+                # Проверяем, является ли этот день выходным для сотрудника:
+                # бит date.weekday() маски установлен для выходных (0 = понедельник)
+                if days_off_mask >> current_date.weekday() & 1:
                     days_off_dates.append(current_date.strftime('%d.%m.%Y'))
 
                 current_date += datetime.timedelta(days=1)
@@ -1599,6 +1617,17 @@ def generate_planning_report(project, tasks, result, task_manager, employee_mana
             except Exception as e:
                 print(f"Ошибка при получении задачи {task_id}: {str(e)}")
 
+    # Ключ сортировки задач по дате начала; задачи без дат уходят в конец
+    no_start_date = '9999-12-31'
+
+    def task_start_key(task):
+        dates = task_dates.get(str(task['id']))
+        if dates is None:
+            dates = task_dates.get(task['id'])
+        if dates is None:
+            return task.get('start_date', no_start_date)
+        return dates.get('start', no_start_date)
+
     if employees_tasks:
         # Для каждого сотрудника выводим его задачи
         for employee_id, emp_tasks in employees_tasks.items():
@@ -1607,13 +1636,7 @@ def generate_planning_report(project, tasks, result, task_manager, employee_mana
                 text += f"{employee['name']} ({employee['position']}):\n"
 
                 # Сортируем задачи по датам
-                sorted_tasks = sorted(
-                    emp_tasks,
-                    key=lambda t: task_dates.get(str(t['id']), {}).get('start', '9999-12-31') if str(
-                        t['id']) in task_dates else
-                    task_dates.get(t['id'], {}).get('start', '9999-12-31') if t['id'] in task_dates else
-                    t.get('start_date', '9999-12-31')
-                )
+                sorted_tasks = sorted(emp_tasks, key=task_start_key)
 
                 total_load = 0
                 for task in sorted_tasks:
@@ -1713,108 +1736,11 @@ def format_date(date_str):
         return "Не указана"
 
     try:
-        import datetime
-        date = datetime.datetime.strptime(date_str, '%Y-%m-%d')
+        date = parse_iso_date(date_str)
         return date.strftime('%d.%m.%Y')
     except ValueError:
         return date_str
 
-def assign_task_with_days_off(task, project_start_date, employee_manager, suitable_employees, employee_workload):
-    """
-    Назначает сотрудника на задачу с учетом выходных дней
-
-    Args:
-        task (dict): Задача для назначения
-        project_start_date (str): Дата начала проекта в формате '%Y-%m-%d'
-        employee_manager: Менеджер сотрудников для проверки доступности
-        suitable_employees (list): Список подходящих сотрудников
-        employee_workload (dict): Словарь загрузки сотрудников
-
-    Returns:
-        tuple: (employee_id, start_date, end_date, calendar_duration) - ID назначенного сотрудника,
-              новая дата начала, новая дата окончания и фактическая длительность в календарных днях
-    """
-    import datetime
-
-    print(f"Назначение сотрудника на задачу '{task['name']}' с учетом выходных дней")
-
-    # Преобразуем дату начала проекта в объект datetime
-    try:
-        start_date = datetime.datetime.strptime(project_start_date, '%Y-%m-%d')
-    except (ValueError, TypeError):
-        # Если дата некорректна, используем текущую
-        start_date = datetime.datetime.now()
-
-    duration = task.get('duration', 1)  # Длительность задачи в рабочих днях
-
-    # Находим наиболее подходящего сотрудника с учетом выходных дней
-    best_employee = None
-    best_start_date = start_date
-    best_end_date = None
-    best_calendar_duration = float('inf')
-
-    for employee in suitable_employees:
-        # Проверяем доступность сотрудника на каждый день с учетом выходных
-        employee_id = employee['id']
-        current_date = start_date
-        working_days = 0
-        calendar_days = 0
-
-        # Максимальное количество дней для поиска (защита от бесконечного цикла)
-        max_days = duration * 3  # Берем с запасом
-
-        while working_days < duration and calendar_days < max_days:
-            date_str = current_date.strftime('%Y-%m-%d')
-
-            # Проверяем, является ли этот день рабочим для сотрудника
-            is_available = employee_manager.is_available(employee_id, date_str)
-
-            if is_available:
-                working_days += 1
-
-            # Увеличиваем счетчик календарных дней и переходим к следующему дню
-            calendar_days += 1
-            current_date = current_date + datetime.timedelta(days=1)
-
-        # Если удалось набрать нужное количество рабочих дней
-        if working_days == duration:
-            # Вычисляем дату окончания (последний рабочий день)
-            end_date = current_date - datetime.timedelta(days=1)
-
-            # Учитываем текущую загрузку сотрудника
-            current_load = employee_workload.get(employee_id, 0)
-
-            # Предпочитаем сотрудника с меньшей загрузкой
-            # и с меньшей календарной длительностью для задачи
-            if (best_employee is None or
-                    current_load < employee_workload.get(best_employee['id'], 0) or
-                    (current_load == employee_workload.get(best_employee['id'], 0) and
-                     calendar_days < best_calendar_duration)):
-                best_employee = employee
-                best_calendar_duration = calendar_days
-                best_end_date = end_date
-        else:
-            print(f"Сотрудник {employee['name']} не может выполнить задачу из-за выходных дней")
-
-    if best_employee:
-        # Обновляем загрузку выбранного сотрудника
-        employee_workload[best_employee['id']] = employee_workload.get(best_employee['id'], 0) + duration
-
-        print(f"Задача '{task['name']}' назначена сотруднику {best_employee['name']}")
-        print(f"  Начало: {best_start_date.strftime('%Y-%m-%d')}")
-        print(f"  Окончание: {best_end_date.strftime('%Y-%m-%d')}")
-        print(f"  Рабочих дней: {duration}")
-        print(f"  Календарных дней: {best_calendar_duration}")
-
-        return (best_employee['id'],
-                best_start_date.strftime('%Y-%m-%d'),
-                best_end_date.strftime('%Y-%m-%d'),
-                best_calendar_duration)
-    else:
-        print(f"Не удалось назначить сотрудника на задачу '{task['name']}' с учетом выходных дней")
-        return None, None, None, None
-
-
 def calculate_project_duration(start_date_str, task_dates):
     """Рассчитывает общую длительность проекта в днях"""
     import datetime
@@ -1823,9 +1749,9 @@ def calculate_project_duration(start_date_str, task_dates):
     if not task_dates:
         return 0
 
-    # Преобразуем строковую дату в объект datetime
+    # Преобразуем строковую дату в объект date
     try:
-        project_start = datetime.datetime.strptime(start_date_str, '%Y-%m-%d')
+        project_start = parse_iso_date(start_date_str)
     except (ValueError, TypeError):
         return 0
 
@@ -1835,7 +1761,7 @@ def calculate_project_duration(start_date_str, task_dates):
     for task_id, dates in task_dates.items():
         if 'end' in dates:
             try:
-                end_date = datetime.datetime.strptime(dates['end'], '%Y-%m-%d')
+                end_date = parse_iso_date(dates['end'])
                 if latest_end_date is None or end_date > latest_end_date:
                     latest_end_date = end_date
             except (ValueError, TypeError):
@@ -1875,7 +1801,7 @@ def calculate_critical_path(task_dates, tasks, task_manager):
     for task_id, dates in task_dates.items():
         if 'end' in dates:
             try:
-                end_date = datetime.datetime.strptime(dates['end'], '%Y-%m-%d')
+                end_date = parse_iso_date(dates['end'])
                 if latest_end_date is None or end_date > latest_end_date:
                     latest_end_date = end_date
                     latest_task_id = task_id
@@ -1908,7 +1834,7 @@ def calculate_critical_path(task_dates, tasks, task_manager):
             predecessor_id = dep['predecessor_id']
             if predecessor_id in task_dates and 'end' in task_dates[predecessor_id]:
                 try:
-                    end_date = datetime.datetime.strptime(task_dates[predecessor_id]['end'], '%Y-%m-%d')
+                    end_date = parse_iso_date(task_dates[predecessor_id]['end'])
                     if latest_predecessor_end is None or end_date > latest_predecessor_end:
                         latest_predecessor_end = end_date
                         latest_predecessor_id = predecessor_id
@@ -1,4 +1,23 @@
 import json
+import logging
+
+from utils.helpers import parse_iso_date
+
+logger = logging.getLogger(__name__)
+
+
+def days_off_mask(days_off):
+    """
+    Преобразует список выходных (1 - понедельник, 7 - воскресенье) в битовую маску
+
+    Бит с номером date.weekday() установлен, если этот день недели выходной,
+    поэтому проверка даты - один сдвиг и побитовое И вместо поиска в списке.
+    """
+    mask = 0
+    for weekday in days_off:
+        if weekday in range(1, 8):
+            mask |= 1 << (weekday - 1)
+    return mask
 
 
 class EmployeeManager:
@@ -29,18 +48,16 @@ class EmployeeManager:
             employee = self.get_employee(employee_id)
 
             # Получаем день недели (0 - понедельник, 6 - воскресенье)
-            # Преобразуем формат даты 'YYYY-MM-DD' в объект datetime
-            from datetime import datetime
-            dt = datetime.strptime(date, '%Y-%m-%d')
-            weekday = dt.weekday() + 1  # +1 чтобы привести к формату 1=пн, 7=вс
+            # Преобразуем формат даты 'YYYY-MM-DD' в объект date
+            weekday = parse_iso_date(date).weekday()
 
             # Проверяем, не выходной ли это день
-            is_day_off = weekday in employee['days_off']
+            is_day_off = bool(employee['days_off_mask'] >> weekday & 1)
 
             # Отладочная информация
-            print(f"Проверка доступности {employee['name']} на {date}: "
-                  f"день недели {weekday}, выходные дни {employee['days_off']}, "
-                  f"результат: {'недоступен' if is_day_off else 'доступен'}")
+            logger.debug("Проверка доступности %s на %s: день недели %s, выходные дни %s, результат: %s",
+                         employee['name'], date, weekday + 1, employee['days_off'],
+                         'недоступен' if is_day_off else 'доступен')
 
             return not is_day_off
         except Exception as e:
@@ -74,6 +91,9 @@ class EmployeeManager:
         else:
             employee_dict['days_off'] = []
 
+        # Маска выходных для быстрой проверки дат (в базе хранится только JSON-список)
+        employee_dict['days_off_mask'] = days_off_mask(employee_dict['days_off'])
+
         return employee_dict
 
     def get_employee_workload(self, project_id):
@@ -100,15 +120,12 @@ class EmployeeManager:
             )
 
             # Создаем словарь для получения имени родительской задачи
+            task_names = {task['id']: task['name'] for task in all_tasks}
             parent_task_names = {}
             for task in all_tasks:
-                task_dict = dict(task)
-                if task_dict.get('parent_id'):
-                    # Найдем родительскую задачу
-                    parent = next((t for t in all_tasks if dict(t)['id'] == task_dict['parent_id']), None)
-                    if parent:
-                        parent_dict = dict(parent)
-                        parent_task_names[task_dict['id']] = parent_dict['name']
+                parent_id = task['parent_id']
+                if parent_id and parent_id in task_names:
+                    parent_task_names[task['id']] = task_names[parent_id]
 
             # Получаем все задачи проекта с назначенными сотрудниками
             assigned_tasks = self.db.execute(
@@ -2,12 +2,15 @@ import datetime
 from collections import defaultdict, deque
 import json
 
+from utils.helpers import parse_iso_date
+
 
 class NetworkModel:
     def __init__(self):
         self.graph = None
         self.tasks = None
         self.task_dict = None
+        self._topological_order = None
 
     def calculate(self, project, tasks):
         """
@@ -142,10 +145,9 @@ class NetworkModel:
 
     def _build_dependency_graph(self):
         """Строит граф зависимостей между основными задачами"""
-        from collections import defaultdict
-
         self.predecessors = defaultdict(list)  # task_id -> [predecessor_ids]
         self.successors = defaultdict(list)  # task_id -> [successor_ids]
+        self._topological_order = None  # Порядок пересчитывается для нового графа
 
         for task in self.tasks:
             task_id = task['id']
@@ -225,23 +227,25 @@ class NetworkModel:
         WHITE, GRAY, BLACK = 0, 1, 2
         colors = {task_id: WHITE for task_id in self.task_dict}
 
-        def dfs(task_id):
-            if colors[task_id] == GRAY:
-                return True  # Цикл найден
-            if colors[task_id] == BLACK:
-                return False
+        # Обход в глубину с явным стеком (вершина, итератор по преемникам),
+        # чтобы длинные цепочки задач не упирались в лимит рекурсии
+        for root_id in self.task_dict:
+            if colors[root_id] != WHITE:
+                continue
 
-            colors[task_id] = GRAY
-            for succ_id in self.successors.get(task_id, []):
-                if dfs(succ_id):
-                    return True
-            colors[task_id] = BLACK
-            return False
-
-        for task_id in self.task_dict:
-            if colors[task_id] == WHITE:
-                if dfs(task_id):
-                    return True
+            colors[root_id] = GRAY
+            stack = [(root_id, iter(self.successors.get(root_id, [])))]
+            while stack:
+                task_id, successors = stack[-1]
+                succ_id = next(successors, None)
+                if succ_id is None:
+                    colors[task_id] = BLACK
+                    stack.pop()
+                elif colors[succ_id] == GRAY:
+                    return True  # Цикл найден
+                elif colors[succ_id] == WHITE:
+                    colors[succ_id] = GRAY
+                    stack.append((succ_id, iter(self.successors.get(succ_id, []))))
         return False
 
     def _forward_pass(self):
@@ -327,7 +331,15 @@ class NetworkModel:
         return late_start, late_finish
 
     def _topological_sort(self):
-        """Топологическая сортировка задач"""
+        """
+        Топологическая сортировка задач
+
+        Порядок вычисляется один раз для построенного графа и переиспользуется
+        прямым и обратным проходами и поиском критического пути
+        """
+        if self._topological_order is not None:
+            return self._topological_order
+
         in_degree = {task_id: len(self.predecessors.get(task_id, [])) for task_id in self.task_dict}
         queue = deque([task_id for task_id, degree in in_degree.items() if degree == 0])
         result = []
@@ -341,6 +353,7 @@ class NetworkModel:
                 if in_degree[succ_id] == 0:
                     queue.append(succ_id)
 
+        self._topological_order = result
         return result
 
     def _calculate_reserves(self, early_start, late_start):
@@ -361,14 +374,18 @@ class NetworkModel:
         if not critical_tasks:
             return []
 
+        # Единственная критическая задача и есть путь
+        if len(critical_tasks) == 1:
+            return critical_tasks
+
         # Строим полный критический путь
         path = []
+        critical_set = set(critical_tasks)
 
         # Находим начальную критическую задачу (без критических предшественников)
         start_tasks = []
         for task_id in critical_tasks:
-            critical_preds = [pred for pred in self.predecessors.get(task_id, []) if pred in critical_tasks]
-            if not critical_preds:
+            if not any(pred in critical_set for pred in self.predecessors.get(task_id, [])):
                 start_tasks.append(task_id)
 
         if not start_tasks:
@@ -376,40 +393,37 @@ class NetworkModel:
             early_times = getattr(self, '_early_start_cache', {})
             return sorted(critical_tasks, key=lambda tid: early_times.get(tid, 0))
 
-        # Строим путь от начальной задачи, проходя через все критические задачи
-        def build_complete_path(current, visited_path):
-            if current in visited_path:
-                return visited_path  # Избегаем циклов
-
-            new_path = visited_path + [current]
-
-            # Ищем всех критических преемников
-            critical_successors = []
-            for succ_id in self.successors.get(current, []):
-                if succ_id in critical_tasks and succ_id not in visited_path:
-                    critical_successors.append(succ_id)
-
-            if not critical_successors:
-                return new_path  # Конец пути
+        # Самый длинный путь по критическим задачам ищем динамическим программированием:
+        # в обратном топологическом порядке для каждой задачи запоминаем длину
+        # лучшего продолжения и следующую задачу на нем (граф ацикличен - циклы
+        # отсекаются в calculate до поиска пути)
+        path_length = {}
+        next_task = {}
+        for task_id in reversed(self._topological_sort()):
+            if task_id not in critical_set:
+                continue
 
-            # Если есть несколько преемников, выбираем тот, который ведет к самому длинному пути
-            best_path = new_path
-            for succ_id in critical_successors:
-                candidate_path = build_complete_path(succ_id, new_path)
-                if len(candidate_path) > len(best_path):
-                    best_path = candidate_path
+            best_length = 0
+            for succ_id in self.successors.get(task_id, []):
+                if succ_id in critical_set and path_length[succ_id] > best_length:
+                    best_length = path_length[succ_id]
+                    next_task[task_id] = succ_id
 
-            return best_path
+            path_length[task_id] = best_length + 1
 
-        # Строим путь от каждой начальной задачи и выбираем самый длинный
-        best_path = []
+        # Выбираем начальную задачу с самым длинным путем
+        best_start = None
         for start_task in start_tasks:
-            candidate_path = build_complete_path(start_task, [])
-            if len(candidate_path) > len(best_path):
-                best_path = candidate_path
+            if best_start is None or path_length[start_task] > path_length[best_start]:
+                best_start = start_task
+
+        best_path = [best_start]
+        while best_path[-1] in next_task:
+            best_path.append(next_task[best_path[-1]])
 
         # Если путь все еще неполный, добавляем оставшиеся критические задачи
-        remaining_critical = [tid for tid in critical_tasks if tid not in best_path]
+        path_set = set(best_path)
+        remaining_critical = [tid for tid in critical_tasks if tid not in path_set]
         if remaining_critical:
             # Сортируем по времени начала и добавляем
             early_times = getattr(self, '_early_start_cache', {})
@@ -417,25 +431,28 @@ class NetworkModel:
 
             # Проверяем, можно ли их логически включить в путь
             for task_id in remaining_sorted:
-                # Проверяем, есть ли связь с уже включенными задачами
-                can_include = False
-                for path_task in best_path:
-                    if (task_id in self.successors.get(path_task, []) or
-                            path_task in self.successors.get(task_id, [])):
-                        can_include = True
-                        break
+                # Проверяем, есть ли связь с уже включенными задачами: задача связана
+                # с путем, если ее предшественник или преемник уже в пути
+                can_include = (
+                    any(pred_id in path_set for pred_id in self.predecessors.get(task_id, [])) or
+                    any(succ_id in path_set for succ_id in self.successors.get(task_id, []))
+                )
 
                 if can_include or not best_path:  # Включаем если есть связь или путь пуст
                     best_path.append(task_id)
+                    path_set.add(task_id)
 
         return best_path
 
     def _calculate_task_dates(self, project_start_date, early_start, early_finish):
         """Вычисляет календарные даты задач"""
+        # Даты в формате YYYY-MM-DD разбираются и форматируются через ISO-методы date,
+        # без разбора шаблона strptime/strftime на каждом вызове (parse_iso_date
+        # принимает и даты без ведущих нулей)
         try:
-            start_date = datetime.datetime.strptime(project_start_date, '%Y-%m-%d')
+            start_date = parse_iso_date(project_start_date)
         except:
-            start_date = datetime.datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+            start_date = datetime.date.today()
 
         task_dates = {}
 
@@ -445,15 +462,15 @@ class NetworkModel:
                 task_end = start_date + datetime.timedelta(days=early_finish[task_id] - 1)
 
                 task_dates[task_id] = {
-                    'start': task_start.strftime('%Y-%m-%d'),
-                    'end': task_end.strftime('%Y-%m-%d')
+                    'start': task_start.isoformat(),
+                    'end': task_end.isoformat()
                 }
             except:
                 # В случае ошибки используем даты по умолчанию
                 duration = self.task_dict[task_id].get('duration', 1)
                 task_dates[task_id] = {
-                    'start': start_date.strftime('%Y-%m-%d'),
-                    'end': (start_date + datetime.timedelta(days=duration - 1)).strftime('%Y-%m-%d')
+                    'start': start_date.isoformat(),
+                    'end': (start_date + datetime.timedelta(days=duration - 1)).isoformat()
                 }
 
         return task_dates
@@ -461,9 +478,9 @@ class NetworkModel:
     def _fallback_calculation(self, project, tasks):
         """Упрощенный расчет в случае ошибок"""
         try:
-            start_date = datetime.datetime.strptime(project['start_date'], '%Y-%m-%d')
+            start_date = parse_iso_date(project['start_date'])
         except:
-            start_date = datetime.datetime.now()
+            start_date = datetime.date.today()
 
         task_dates = {}
         current_date = start_date
@@ -473,8 +490,8 @@ class NetworkModel:
             duration = max(1, task.get('duration', 1))
 
             task_dates[task_id] = {
-                'start': current_date.strftime('%Y-%m-%d'),
-                'end': (current_date + datetime.timedelta(days=duration - 1)).strftime('%Y-%m-%d')
+                'start': current_date.isoformat(),
+                'end': (current_date + datetime.timedelta(days=duration - 1)).isoformat()
             }
 
             current_date += datetime.timedelta(days=duration)
@@ -11,8 +11,8 @@ class ProjectManager:
     def create_from_template(self, name, start_date, template_id, user_id=None):
         """Создает проект из шаблона"""
         try:
-            # Валидация даты
-            datetime.datetime.strptime(start_date, '%Y-%m-%d')
+            # Валидация даты; в базу сохраняем ее в каноническом виде YYYY-MM-DD
+            start_date = datetime.datetime.strptime(start_date, '%Y-%m-%d').date().isoformat()
 
             # Проверяем существование шаблона
             if template_id not in Config.PROJECT_TEMPLATES:
@@ -89,8 +89,8 @@ class ProjectManager:
     def create_from_csv(self, name, start_date, csv_data, user_id=None):
         """Создает проект из данных CSV"""
         try:
-            # Валидация даты
-            datetime.datetime.strptime(start_date, '%Y-%m-%d')
+            # Валидация даты; в базу сохраняем ее в каноническом виде YYYY-MM-DD
+            start_date = datetime.datetime.strptime(start_date, '%Y-%m-%d').date().isoformat()
 
             # Создаем проект
             project_id = self.db.create_project(name, start_date, user_id)
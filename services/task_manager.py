@@ -8,8 +8,13 @@ class TaskManager:
 
     def get_tasks_by_project(self, project_id):
         """Возвращает список задач проекта"""
-        tasks = self.db.get_tasks(project_id)
+        return self._with_predecessors(self.db.get_tasks(project_id))
+
+    def _with_predecessors(self, tasks):
+        """Преобразует строки задач в словари и добавляет к ним список предшественников"""
         result = []
+        # Задачи без поля predecessors берут зависимости из таблицы зависимостей
+        pending_ids = []
 
         for task in tasks:
             task_dict = dict(task)
@@ -21,12 +26,17 @@ class TaskManager:
                 except (json.JSONDecodeError, TypeError):
                     task_dict['predecessors'] = []
             else:
-                # Если в задаче нет информации о предшественниках, получаем ее из таблицы зависимостей
-                dependencies = self.db.get_task_dependencies(task_dict['id'])
-                task_dict['predecessors'] = [dep['predecessor_id'] for dep in dependencies]
+                pending_ids.append(task_dict['id'])
 
             result.append(task_dict)
 
+        if pending_ids:
+            # Зависимости всех таких задач получаем одним запросом
+            dependencies = self.get_all_task_dependencies(pending_ids)
+            for task_dict in result:
+                if task_dict['id'] in dependencies:
+                    task_dict['predecessors'] = dependencies[task_dict['id']]
+
         return result
 
     def get_subtasks(self, task_id):
@@ -34,6 +44,14 @@ class TaskManager:
         subtasks = self.db.get_subtasks(task_id)
         return [dict(subtask) for subtask in subtasks]
 
+    def get_subtasks_bulk(self, task_ids):
+        """Возвращает подзадачи для нескольких групповых задач, сгруппированные по ID родителя"""
+        result = {task_id: [] for task_id in task_ids}
+        for subtask in self.db.get_subtasks_bulk(list(task_ids)):
+            subtask_dict = dict(subtask)
+            result.setdefault(subtask_dict['parent_id'], []).append(subtask_dict)
+        return result
+
     def get_task(self, task_id):
         """Возвращает информацию о задаче"""
         task = self.db.get_task(task_id)
@@ -158,6 +176,18 @@ class TaskManager:
         dependencies = self.db.get_task_dependencies(task_id)
         return [dict(dep) for dep in dependencies]
 
+    def get_all_dependencies(self, task_ids):
+        """Возвращает пары (task_id, predecessor_id) для всех указанных задач"""
+        dependencies = self.db.get_dependencies_bulk(list(task_ids))
+        return [(dep['task_id'], dep['predecessor_id']) for dep in dependencies]
+
+    def get_all_task_dependencies(self, task_ids):
+        """Возвращает словарь task_id -> список ID предшественников для всех указанных задач"""
+        result = {task_id: [] for task_id in task_ids}
+        for task_id, predecessor_id in self.get_all_dependencies(task_ids):
+            result.setdefault(task_id, []).append(predecessor_id)
+        return result
+
     def get_task_dependents(self, task_id):
         """Возвращает список задач, зависящих от указанной"""
         dependents = self.db.get_dependents(task_id)
@@ -194,52 +224,35 @@ class TaskManager:
         if task_id == predecessor_id:
             return True
 
-        # Проверяем, не является ли задача уже предшественником для предшественника
-        predecessors_of_predecessor = self.get_task_dependencies(predecessor_id)
-        for dep in predecessors_of_predecessor:
-            if dep["predecessor_id"] == task_id:
-                return True
+        # Обходим всех предшественников предшественника явным стеком: глубина цепочки
+        # не ограничена лимитом рекурсии, а каждая задача проверяется один раз
+        stack = [predecessor_id]
+        visited = {predecessor_id}
+        while stack:
+            for dep in self.get_task_dependencies(stack.pop()):
+                # Задача уже является предшественником для предшественника
+                if dep["predecessor_id"] == task_id:
+                    return True
 
-            # Рекурсивно проверяем предшественников
-            if self._is_cyclic_dependency(task_id, dep["predecessor_id"]):
-                return True
+                if dep["predecessor_id"] not in visited:
+                    visited.add(dep["predecessor_id"])
+                    stack.append(dep["predecessor_id"])
 
         return False
 
     def update_task_dates(self, task_dates):
-        """Обновляет даты начала и окончания задач"""
-        for task_id, dates in task_dates.items():
-            # Проверяем наличие необходимых данных
-            if 'start' in dates and 'end' in dates:
-                try:
-                    # Проверяем, существует ли задача
-                    task = self.get_task(task_id)
-                    if task:
-                        self.db.update_task_dates(task_id, dates['start'], dates['end'])
-                except ValueError:
-                    # Задача не найдена, пропускаем
-                    continue
+        """
+        Обновляет даты начала и окончания задач
+
+        Все задачи обновляются одним пакетом в одной транзакции. Отдельная проверка
+        существования не нужна: UPDATE для несуществующей задачи ничего не меняет.
+        """
+        updates = [(dates['start'], dates['end'], task_id)
+                   for task_id, dates in task_dates.items() if 'start' in dates and 'end' in dates]
+        if updates:
+            self.db.execute_many("UPDATE tasks SET start_date = ?, end_date = ? WHERE id = ?", updates)
 
     def get_all_tasks_by_project(self, project_id):
         """Возвращает список всех задач проекта, включая подзадачи"""
-        tasks = self.db.get_all_project_tasks(project_id)
-        result = []
-
-        for task in tasks:
-            task_dict = dict(task)
-
-            # Добавляем информацию о предшественниках
-            if 'predecessors' in task_dict and task_dict['predecessors']:
-                try:
-                    task_dict['predecessors'] = json.loads(task_dict['predecessors'])
-                except (json.JSONDecodeError, TypeError):
-                    task_dict['predecessors'] = []
-            else:
-                # Если в задаче нет информации о предшественниках, получаем ее из таблицы зависимостей
-                dependencies = self.db.get_task_dependencies(task_dict['id'])
-                task_dict['predecessors'] = [dep['predecessor_id'] for dep in dependencies]
-
-            result.append(task_dict)
-
-        return result
+        return self._with_predecessors(self.db.get_all_project_tasks(project_id))
 
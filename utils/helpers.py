@@ -175,6 +175,29 @@ def parse_csv(csv_content):
     return tasks, errors
 
 
+def parse_iso_date(date_str):
+    """
+    Разбирает дату в формате YYYY-MM-DD в объект datetime.date
+
+    Быстрый date.fromisoformat принимает только даты с ведущими нулями, а проверка
+    ввода через strptime('%Y-%m-%d') допускает и '2025-3-3'. Такие даты могли
+    попасть в базу, поэтому для них выполняется разбор через strptime.
+
+    Args:
+        date_str (str): Дата в формате YYYY-MM-DD
+
+    Returns:
+        datetime.date: Дата
+
+    Raises:
+        ValueError: Если строка не является датой в формате YYYY-MM-DD
+    """
+    try:
+        return datetime.date.fromisoformat(date_str)
+    except ValueError:
+        return datetime.datetime.strptime(date_str, '%Y-%m-%d').date()
+
+
 def format_date(date_str):
     """
     Форматирует дату для отображения
@@ -189,7 +212,7 @@ def format_date(date_str):
         return "Не указана"
 
     try:
-        date = datetime.datetime.strptime(date_str, '%Y-%m-%d')
+        date = parse_iso_date(date_str)
         return date.strftime('%d.%m.%Y')
     except ValueError:
         return date_str
@@ -243,9 +266,9 @@ def add_days_to_date(date_str, days):
     Returns:
         str: Новая дата в формате YYYY-MM-DD
     """
-    date = datetime.datetime.strptime(date_str, '%Y-%m-%d')
+    date = parse_iso_date(date_str)
     new_date = date + datetime.timedelta(days=days)
-    return new_date.strftime('%Y-%m-%d')
+    return new_date.isoformat()
 
 
 def calculate_end_date(start_date, duration):
@@ -274,8 +297,8 @@ def get_working_days(start_date, end_date, days_off):
     Returns:
         int: Количество рабочих дней
     """
-    start = datetime.datetime.strptime(start_date, '%Y-%m-%d')
-    end = datetime.datetime.strptime(end_date, '%Y-%m-%d')
+    start = parse_iso_date(start_date)
+    end = parse_iso_date(end_date)
 
     # Преобразуем дни недели из 1-7 в 0-6 (формат Python)
     python_days_off = [(day - 1) % 7 for day in days_off]
@@ -303,7 +326,7 @@ def adjust_date_for_days_off(date_str, duration, days_off):
     Returns:
         str: Скорректированная дата окончания в формате YYYY-MM-DD
     """
-    start = datetime.datetime.strptime(date_str, '%Y-%m-%d')
+    start = parse_iso_date(date_str)
 
     # Преобразуем дни недели из 1-7 в 0-6 (формат Python)
     python_days_off = [(day - 1) % 7 for day in days_off]
@@ -316,4 +339,4 @@ def adjust_date_for_days_off(date_str, duration, days_off):
         if current.weekday() not in python_days_off:
             working_days += 1
 
-    return current.strftime('%Y-%m-%d')
\ No newline at end of file
+    return current.isoformat()
\ No newline at end of file
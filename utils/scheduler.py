@@ -1,12 +1,37 @@
 """
 Updated version of utils/scheduler.py with improved dependency handling and parallel subtask assignment
 """
+import copy
 import datetime
+import hashlib
+import heapq
 import json
-from collections import defaultdict, deque
+import logging
+from collections import Counter, defaultdict, deque
+from functools import lru_cache
 
 # Импортируем новые функции работы с доступностью сотрудников
-from utils.employee_availability import find_suitable_employee, get_available_dates_for_task
+from utils.employee_availability import (clear_available_dates_cache, get_available_dates_for_task,
+                                         get_employees_by_position)
+from utils.helpers import parse_iso_date
+
+logger = logging.getLogger(__name__)
+
+# Кэш результатов планирования: ключ - хэш всех входных данных планировщика
+_schedule_cache = {}
+SCHEDULE_CACHE_SIZE = 16
+
+# Поля задачи, от которых зависит результат планирования
+_SCHEDULE_TASK_FIELDS = ('id', 'name', 'duration', 'employee_id', 'position', 'predecessors',
+                         'is_group', 'parent_id', 'parallel')
+
+
+class CycleError(ValueError):
+    """Граф зависимостей содержит циклы; cycles - список циклов (списков ID задач)"""
+
+    def __init__(self, cycles):
+        self.cycles = cycles
+        super().__init__(f"В графе зависимостей обнаружены циклы: {cycles}")
 
 
 def schedule_project(project, tasks, task_manager, employee_manager):
@@ -22,55 +47,125 @@ def schedule_project(project, tasks, task_manager, employee_manager):
     Returns:
         dict: Результаты планирования
     """
-    print(f"Начинаем планирование проекта '{project['name']}'...")
+    cache_key = _schedule_cache_key(project, tasks, task_manager, employee_manager)
+    if cache_key is not None and cache_key in _schedule_cache:
+        logger.debug("Проект '%s' не изменился, используем сохраненный план", project['name'])
+        return copy.deepcopy(_schedule_cache[cache_key])
+
+    logger.info("Начинаем планирование проекта '%s'...", project['name'])
+
+    # Выходные сотрудников могли измениться с прошлого планирования
+    clear_available_dates_cache()
 
     # Шаг 1: Строим граф зависимостей
     graph, task_map = build_dependency_graph(tasks, task_manager)
-    print(f"Построен граф зависимостей с {len(graph)} вершинами")
+    logger.debug("Построен граф зависимостей с %s вершинами", len(graph))
 
     # Шаг 2: Выполняем топологическую сортировку
-    sorted_tasks = topological_sort(graph)
-    print(f"Задачи отсортированы в порядке зависимостей, всего {len(sorted_tasks)} задач")
+    successors = build_successors(graph)
+    try:
+        sorted_tasks = topological_sort(graph, successors)
+    except CycleError as e:
+        # С циклами даты задач не определены - дальнейшие шаги бессмысленны
+        logger.error("Планирование проекта '%s' прервано: %s", project['name'], e)
+        return {
+            'task_dates': {},
+            'critical_path': [],
+            'duration': 0,
+            'error': str(e),
+            'cycles': e.cycles
+        }
+    logger.debug("Задачи отсортированы в порядке зависимостей, всего %s задач", len(sorted_tasks))
 
     # Шаг 3: Инициализируем систему отслеживания нагрузки сотрудников
-    employee_workload = {}  # employee_id -> общее количество дней
-    employee_schedule = {}  # employee_id -> {date: task_count}
+    # Нагрузка учитывается одним счетчиком дней на сотрудника: разбивка по датам
+    # при выборе исполнителя не используется
+    employee_workload = Counter()  # employee_id -> общее количество дней
 
-    # Шаг 4: Рассчитываем даты задач с учетом зависимостей и балансировки нагрузки
+    # Шаг 4: Рассчитываем даты задач с учетом зависимостей и балансировки нагрузки.
+    # Индекс подзадач строится один раз и переиспользуется следующими шагами
+    task_index = index_task_map(task_map)
     task_dates = calculate_tasks_with_dependencies(
         project, sorted_tasks, graph, task_map, task_manager, employee_manager,
-        employee_workload, employee_schedule
+        employee_workload, task_index=task_index
     )
 
     # Шаг 5: Проверяем корректность назначения параллельных подзадач
-    parallel_issues = validate_parallel_assignments(task_dates, task_map)
+    parallel_issues = validate_parallel_assignments(task_dates, task_map, children_index=task_index[1])
     if parallel_issues:
-        print(f"❌ Найдено {len(parallel_issues)} проблем с параллельными подзадачами:")
+        logger.error("❌ Найдено %s проблем с параллельными подзадачами:", len(parallel_issues))
         for issue in parallel_issues:
-            print(f"  • {issue}")
+            logger.debug("  • %s", issue)
     else:
-        print("✅ Параллельные подзадачи назначены корректно")
+        logger.debug("✅ Параллельные подзадачи назначены корректно")
 
     # Шаг 6: Балансировка нагрузки между сотрудниками
     task_dates = balance_workload_final(task_dates, task_map, employee_manager, employee_workload)
 
     # Шаг 7: Определяем критический путь
     critical_path = identify_critical_path_without_subtasks(task_dates, graph, task_map)
-    print(f"Критический путь содержит {len(critical_path)} задач")
+    logger.debug("Критический путь содержит %s задач", len(critical_path))
 
     # Шаг 8: Рассчитываем длительность проекта
     project_duration = calculate_project_duration_unified(project['start_date'], task_dates)
-    print(f"Длительность проекта: {project_duration} дней")
+    logger.info("Длительность проекта: %s дней", project_duration)
 
     # Выводим статистику нагрузки
     print_workload_statistics(employee_workload, employee_manager)
 
-    return {
+    result = {
         'task_dates': task_dates,
         'critical_path': critical_path,
         'duration': project_duration
     }
 
+    if cache_key is not None:
+        if len(_schedule_cache) >= SCHEDULE_CACHE_SIZE:
+            # Удаляем самый старый результат
+            del _schedule_cache[next(iter(_schedule_cache))]
+        _schedule_cache[cache_key] = copy.deepcopy(result)
+
+    return result
+
+
+def _schedule_cache_key(project, tasks, task_manager, employee_manager):
+    """
+    Вычисляет ключ кэша планирования по содержимому входных данных
+
+    Помимо переданных задач учитываются подзадачи и зависимости из базы данных
+    и выходные дни сотрудников, поэтому любое изменение, влияющее на план,
+    дает новый ключ и отдельная инвалидация кэша не нужна.
+
+    Returns:
+        bytes: Ключ кэша или None, если входные данные получить не удалось
+    """
+    try:
+        def signature(task):
+            return tuple(repr(task.get(field)) for field in _SCHEDULE_TASK_FIELDS)
+
+        group_ids = [task['id'] for task in tasks if task.get('is_group')]
+        subtasks = task_manager.get_subtasks_bulk(group_ids) if group_ids else {}
+
+        inputs = (
+            project.get('start_date'),
+            tuple(signature(task) for task in tasks),
+            tuple((group_id, tuple(signature(subtask) for subtask in group_subtasks))
+                  for group_id, group_subtasks in sorted(subtasks.items())),
+            tuple(task_manager.get_all_dependencies([task['id'] for task in tasks])),
+            tuple((employee['id'], employee.get('position'), repr(employee.get('days_off')))
+                  for employee in employee_manager.get_all_employees())
+        )
+        return hashlib.blake2b(repr(inputs).encode(), digest_size=16).digest()
+    except Exception as e:
+        logger.error("Не удалось вычислить ключ кэша планирования: %s", e)
+        return None
+
+
+def clear_schedule_cache():
+    """Очищает кэш результатов планирования"""
+    _schedule_cache.clear()
+    clear_available_dates_cache()
+
 
 def calculate_project_duration_unified(project_start_date, task_dates):
     """
@@ -86,73 +181,58 @@ def calculate_project_duration_unified(project_start_date, task_dates):
     if not task_dates:
         return 0
 
+    # Парсим дату начала проекта; некорректные даты задач отбрасывает
+    # _extreme_iso_date, поэтому другие ошибки здесь не ожидаются
     try:
-        # Парсим дату начала проекта
-        project_start = datetime.datetime.strptime(project_start_date, '%Y-%m-%d')
-
-        # Находим самую позднюю дату окончания среди всех задач
-        latest_end_date = None
-        earliest_start_date = None
-
-        for task_id, dates in task_dates.items():
-            # Проверяем дату начала
-            if 'start' in dates and dates['start']:
-                try:
-                    start_date = datetime.datetime.strptime(dates['start'], '%Y-%m-%d')
-                    if earliest_start_date is None or start_date < earliest_start_date:
-                        earliest_start_date = start_date
-                except (ValueError, TypeError):
-                    continue
-
-            # Проверяем дату окончания
-            if 'end' in dates and dates['end']:
-                try:
-                    end_date = datetime.datetime.strptime(dates['end'], '%Y-%m-%d')
-                    if latest_end_date is None or end_date > latest_end_date:
-                        latest_end_date = end_date
-                except (ValueError, TypeError):
-                    continue
+        project_start = _parse_date(project_start_date)
+    except (ValueError, TypeError) as e:
+        logger.error("Ошибка при расчете длительности проекта: %s", e)
+        return 0
 
-        if latest_end_date is None:
-            return 0
+    # Находим самую раннюю дату начала и самую позднюю дату окончания среди всех задач
+    earliest_start_date = _extreme_iso_date(
+        (dates.get('start') for dates in task_dates.values()), latest=False
+    )
+    latest_end_date = _extreme_iso_date(
+        (dates.get('end') for dates in task_dates.values()), latest=True
+    )
 
-        # Используем фактическую дату начала или дату начала проекта
-        actual_start = earliest_start_date if earliest_start_date else project_start
+    if latest_end_date is None:
+        return 0
 
-        # Рассчитываем длительность включительно
-        # От первого дня до последнего дня включительно
-        duration = (latest_end_date - actual_start).days + 1
+    # Используем фактическую дату начала или дату начала проекта
+    actual_start = earliest_start_date if earliest_start_date else project_start
 
-        print(f"[Duration Debug] Расчет длительности проекта:")
-        print(f"[Duration Debug]   Дата начала: {actual_start.strftime('%Y-%m-%d')}")
-        print(f"[Duration Debug]   Дата окончания: {latest_end_date.strftime('%Y-%m-%d')}")
-        print(f"[Duration Debug]   Длительность: {duration} дней")
+    # Рассчитываем длительность включительно
+    # От первого дня до последнего дня включительно
+    duration = (latest_end_date - actual_start).days + 1
 
-        return duration
+    logger.debug("[Duration Debug] Расчет длительности проекта:")
+    logger.debug("[Duration Debug]   Дата начала: %s", _format_date(actual_start))
+    logger.debug("[Duration Debug]   Дата окончания: %s", _format_date(latest_end_date))
+    logger.debug("[Duration Debug]   Длительность: %s дней", duration)
 
-    except Exception as e:
-        print(f"Ошибка при расчете длительности проекта: {str(e)}")
-        return 0
+    return duration
 
 def balance_workload_final(task_dates, task_map, employee_manager, employee_workload):
     """
     Финальная балансировка нагрузки между сотрудниками
     """
-    print("Выполняется балансировка нагрузки...")
+    logger.debug("Выполняется балансировка нагрузки...")
 
     # Группируем сотрудников по должностям
+    employees = _load_employees_by_id(employee_manager)
     position_employees = {}
     for emp_id, workload in employee_workload.items():
-        try:
-            employee = employee_manager.get_employee(emp_id)
-            position = employee.get('position', 'Неизвестно')
-
-            if position not in position_employees:
-                position_employees[position] = []
-            position_employees[position].append(emp_id)
-        except:
+        employee = employees.get(emp_id)
+        if employee is None:
             continue
 
+        position = employee.get('position', 'Неизвестно')
+        if position not in position_employees:
+            position_employees[position] = []
+        position_employees[position].append(emp_id)
+
     # Для каждой должности балансируем нагрузку
     for position, emp_ids in position_employees.items():
         if len(emp_ids) < 2:
@@ -162,7 +242,7 @@ def balance_workload_final(task_dates, task_map, employee_manager, employee_work
         total_workload = sum(employee_workload.get(emp_id, 0) for emp_id in emp_ids)
         avg_workload = total_workload / len(emp_ids)
 
-        print(f"Должность {position}: средняя нагрузка {avg_workload:.1f} дней")
+        logger.debug("Должность %s: средняя нагрузка %.1f дней", position, avg_workload)
 
         # Находим перегруженных и недогруженных
         overloaded = [(emp_id, employee_workload.get(emp_id, 0)) for emp_id in emp_ids
@@ -171,19 +251,31 @@ def balance_workload_final(task_dates, task_map, employee_manager, employee_work
                        if employee_workload.get(emp_id, 0) < avg_workload - 3]
 
         if overloaded and underloaded:
-            print(
-                f"Балансировка для должности {position}: {len(overloaded)} перегружены, {len(underloaded)} недогружены")
+            logger.debug(
+                "Балансировка для должности %s: %s перегружены, %s недогружены", position, len(overloaded), len(underloaded))
             # Здесь можно добавить логику перераспределения задач
 
     return task_dates
 
 def calculate_tasks_with_dependencies(project, sorted_tasks, graph, task_map, task_manager,
-                                      employee_manager, employee_workload, employee_schedule):
+                                      employee_manager, employee_workload, task_index=None):
     """
     Рассчитывает даты задач с учетом зависимостей и равномерного распределения нагрузки
+
+    Args:
+        task_index (tuple): Результат index_task_map(task_map), если уже построен;
+                            индекс подзадач дополняется подзадачами из базы данных
     """
     task_dates = {}
 
+    # Один проход по task_map: групповые задачи и индекс подзадач,
+    # затем подзадачи всех групповых задач загружаем одним запросом
+    group_tasks, children_index = task_index if task_index is not None else index_task_map(task_map)
+    subtasks_cache = prefetch_group_subtasks(group_tasks, task_manager)
+
+    # Очереди сотрудников по должностям для выбора наименее загруженного (см. _least_loaded_employee)
+    load_heaps = {}
+
     for task_id in sorted_tasks:
         if task_id not in task_map:
             continue
@@ -195,53 +287,50 @@ def calculate_tasks_with_dependencies(project, sorted_tasks, graph, task_map, ta
         if task.get('parent_id'):
             continue
 
-        # Определяем дату начала на основе предшественников
+        # Определяем дату начала на основе предшественников (порядковый номер дня)
         start_date = calculate_task_start_date(task_id, graph, task_dates, project['start_date'])
 
         # Рассчитываем задачу
         if task.get('is_group'):
             # Для групповой задачи сначала устанавливаем предварительные даты
             task_duration = task.get('duration', 1)
-            end_date = start_date + datetime.timedelta(days=task_duration - 1)
             task_dates[task_id] = {
-                'start': start_date.strftime('%Y-%m-%d'),
-                'end': end_date.strftime('%Y-%m-%d')
+                'start': _ordinal_to_str(start_date),
+                'end': _ordinal_to_str(start_date + task_duration - 1)
             }
-            print(f"Групповая задача {task_id}: {task_name} - предварительные даты")
+            logger.debug("Групповая задача %s: %s - предварительные даты", task_id, task_name)
 
             # Обрабатываем подзадачи
             process_group_subtasks(task_id, task, start_date, task_dates, task_map,
-                                   task_manager, employee_manager, employee_workload, employee_schedule)
+                                   task_manager, employee_manager, employee_workload,
+                                   subtasks_cache=subtasks_cache, children_index=children_index,
+                                   load_heaps=load_heaps)
         else:
             # Обычная задача
             assign_regular_task(task_id, task, start_date, task_dates, employee_manager,
-                                employee_workload, employee_schedule)
+                                employee_workload, load_heaps=load_heaps)
 
     return task_dates
 
 
-def validate_parallel_assignments(task_dates, task_map):
+def validate_parallel_assignments(task_dates, task_map, children_index=None):
     """
     ИСПРАВЛЕННАЯ версия: Проверяет корректность назначения параллельных подзадач
 
+    Args:
+        children_index (dict): Индекс подзадач из index_task_map, если уже построен
+
     Returns:
         list: Список найденных проблем
     """
     issues = []
 
-    print("Проверка корректности назначения параллельных подзадач...")
+    logger.debug("Проверка корректности назначения параллельных подзадач...")
 
     # Группируем подзадачи по родительской задаче
-    parent_subtasks = {}
-    for task_id, task in task_map.items():
-        parent_id = task.get('parent_id')
-        if parent_id:
-            parent_id_str = str(parent_id)
-            if parent_id_str not in parent_subtasks:
-                parent_subtasks[parent_id_str] = []
-            parent_subtasks[parent_id_str].append(task)
+    parent_subtasks = children_index if children_index is not None else index_task_map(task_map)[1]
 
-    print(f"Найдено {len(parent_subtasks)} групповых задач с подзадачами")
+    logger.debug("Найдено %s групповых задач с подзадачами", len(parent_subtasks))
 
     # Проверяем каждую группу подзадач
     for parent_id, subtasks in parent_subtasks.items():
@@ -251,7 +340,8 @@ def validate_parallel_assignments(task_dates, task_map):
         if not parallel_subtasks:
             continue  # Нет параллельных подзадач в этой группе
 
-        print(f"Группа {parent_id}: найдено {len(parallel_subtasks)} параллельных подзадач из {len(subtasks)} общих")
+        logger.debug(
+            "Группа %s: найдено %s параллельных подзадач из %s общих", parent_id, len(parallel_subtasks), len(subtasks))
 
         # Группируем параллельные подзадачи по имени и должности
         parallel_groups = {}  # (name, position) -> [subtasks]
@@ -270,8 +360,8 @@ def validate_parallel_assignments(task_dates, task_map):
             if len(subtask_group) <= 1:
                 continue  # Только одна подзадача с таким именем - проблем нет
 
-            print(
-                f"Проверка группы параллельных подзадач: '{subtask_name}' ({position}) - {len(subtask_group)} подзадач")
+            logger.debug(
+                "Проверка группы параллельных подзадач: '%s' (%s) - %s подзадач", subtask_name, position, len(subtask_group))
 
             # Проверяем назначения в этой группе
             assigned_employees = []
@@ -286,7 +376,7 @@ def validate_parallel_assignments(task_dates, task_map):
                 elif subtask_id in task_dates:
                     dates_info = task_dates[subtask_id]
                 else:
-                    print(f"  ⚠️ Подзадача {subtask_id} не найдена в task_dates")
+                    logger.warning("  ⚠️ Подзадача %s не найдена в task_dates", subtask_id)
                     continue
 
                 employee_id = dates_info.get('employee_id')
@@ -309,15 +399,14 @@ def validate_parallel_assignments(task_dates, task_map):
             total_subtasks = len(assigned_employees)
 
             # Выводим детали для диагностики
-            print(f"  Детали назначений для '{subtask_name}':")
+            logger.debug("  Детали назначений для '%s':", subtask_name)
             for detail in task_details:
-                print(
-                    f"    Подзадача {detail['subtask_id']}: сотрудник {detail['employee_id']}, дата {detail['start_date']}")
+                logger.debug(
+                    "    Подзадача %s: сотрудник %s, дата %s", detail['subtask_id'], detail['employee_id'], detail['start_date'])
 
             # ОСНОВНАЯ ПРОВЕРКА: есть ли реальная проблема?
             if unique_employees < total_subtasks:
                 # Есть дублирование - ищем конкретные случаи
-                from collections import Counter
                 employee_counts = Counter(assigned_employees)
                 duplicated_employees = [emp_id for emp_id, count in employee_counts.items() if count > 1]
 
@@ -343,814 +432,379 @@ def validate_parallel_assignments(task_dates, task_map):
                                     f"параллельных подзадач '{subtask_name}' на дату {date} в группе {parent_id}. "
                                     f"Это невозможно выполнить!"
                                 )
-                                print(
-                                    f"  ❌ НАЙДЕНА РЕАЛЬНАЯ ПРОБЛЕМА: сотрудник {dup_emp_id} имеет {len(tasks_on_date)} задач на {date}")
+                                logger.error(
+                                    "  ❌ НАЙДЕНА РЕАЛЬНАЯ ПРОБЛЕМА: сотрудник %s имеет %s задач на %s", dup_emp_id, len(tasks_on_date), date)
                             else:
                                 # Задачи назначены одному сотруднику, но в разные дни - это может быть нормально
-                                print(
-                                    f"  ✓ Сотрудник {dup_emp_id} имеет несколько подзадач '{subtask_name}', но в разные дни - ОК")
+                                logger.debug(
+                                    "  ✓ Сотрудник %s имеет несколько подзадач '%s', но в разные дни - ОК", dup_emp_id, subtask_name)
                 else:
-                    print(f"  ✓ Группа '{subtask_name}' в {parent_id}: назначения корректны")
+                    logger.debug("  ✓ Группа '%s' в %s: назначения корректны", subtask_name, parent_id)
             else:
-                print(
-                    f"  ✓ Группа '{subtask_name}' в {parent_id}: все {total_subtasks} подзадач назначены {unique_employees} разным сотрудникам")
+                logger.debug(
+                    "  ✓ Группа '%s' в %s: все %s подзадач назначены %s разным сотрудникам", subtask_name, parent_id, total_subtasks, unique_employees)
 
     if not issues:
-        print("✅ Проверка параллельных подзадач завершена - критических проблем не найдено!")
+        logger.debug("✅ Проверка параллельных подзадач завершена - критических проблем не найдено!")
     else:
-        print(f"❌ Найдено {len(issues)} реальных проблем с параллельными подзадачами")
+        logger.error("❌ Найдено %s реальных проблем с параллельными подзадачами", len(issues))
 
     return issues
 
 def process_group_subtasks(group_id, group_task, group_start, task_dates, task_map,
-                           task_manager, employee_manager, employee_workload, employee_schedule):
+                           task_manager, employee_manager, employee_workload,
+                           subtasks_cache=None, children_index=None, load_heaps=None):
     """
     Обрабатывает подзадачи групповой задачи
+
+    Дата начала группы передается порядковым номером дня (date.toordinal()).
     """
     # Получаем все подзадачи
-    subtasks = get_all_subtasks_for_group(group_id, task_map, task_manager)
+    subtasks = get_all_subtasks_for_group(group_id, task_map, task_manager, subtasks_cache, children_index)
 
     if not subtasks:
         return
 
-    print(f"Обработка {len(subtasks)} подзадач для групповой задачи {group_id}")
+    logger.debug("Обработка %s подзадач для групповой задачи %s", len(subtasks), group_id)
 
     # Разделяем на параллельные и последовательные
-    parallel_subtasks = [task for task in subtasks if task.get('parallel')]
-    sequential_subtasks = [task for task in subtasks if not task.get('parallel')]
+    parallel_subtasks, sequential_subtasks = _split_subtasks(subtasks)
+
+    # Границы подзадач запоминаем по ID: подзадача может встретиться в списке
+    # повторно, и тогда в task_dates остается только ее последнее назначение
+    placements = {}
 
     # Обрабатываем параллельные подзадачи
     for subtask in parallel_subtasks:
-        assign_subtask(subtask, group_start, task_dates, employee_manager, employee_workload, is_parallel=True)
+        placements[subtask['id']] = assign_subtask(subtask, group_start, task_dates, employee_manager,
+                                                   employee_workload, is_parallel=True, load_heaps=load_heaps)
 
     # Обрабатываем последовательные подзадачи
     current_date = group_start
     for subtask in sequential_subtasks:
-        new_end_date = assign_subtask(subtask, current_date, task_dates, employee_manager, employee_workload,
-                                      is_parallel=False)
-        if new_end_date:
-            current_date = new_end_date + datetime.timedelta(days=1)
+        start, new_end_date = assign_subtask(subtask, current_date, task_dates, employee_manager,
+                                             employee_workload, is_parallel=False, load_heaps=load_heaps)
+        placements[subtask['id']] = (start, new_end_date)
+        current_date = new_end_date + 1
 
-    # Обновляем даты групповой задачи на основе подзадач
-    update_group_task_dates(group_id, subtasks, task_dates)
+    # Обновляем даты групповой задачи на основе итоговых дат подзадач
+    if group_id in task_dates:
+        task_dates[group_id]['start'] = _ordinal_to_str(min(start for start, _ in placements.values()))
+        task_dates[group_id]['end'] = _ordinal_to_str(max(end for _, end in placements.values()))
 
-def assign_parallel_subtask_group(subtask_group, group_start, task_dates, employee_manager,
-                                  employee_workload, task_name, position):
+def _split_subtasks(subtasks):
     """
-    Назначает группу одинаковых параллельных подзадач разным сотрудникам
-
-    Args:
-        subtask_group (list): Список подзадач с одинаковым именем
-        group_start (datetime): Дата начала группы
-        task_dates (dict): Словарь дат задач
-        employee_manager: Менеджер сотрудников
-        employee_workload (dict): Текущая нагрузка сотрудников
-        task_name (str): Имя подзадачи
-        position (str): Требуемая должность
-    """
-    if not position:
-        print(f"⚠️ Не указана должность для параллельных подзадач '{task_name}'")
-        # Назначаем без учета должности
-        for subtask in subtask_group:
-            assign_subtask(subtask, group_start, task_dates, employee_manager,
-                           employee_workload, is_parallel=True)
-        return
-
-    # Получаем всех сотрудников с нужной должностью
-    try:
-        available_employees = employee_manager.get_employees_by_position(position)
-
-        if not available_employees:
-            print(f"⚠️ Не найдены сотрудники с должностью '{position}' для подзадач '{task_name}'")
-            # Назначаем без учета должности
-            for subtask in subtask_group:
-                assign_subtask(subtask, group_start, task_dates, employee_manager,
-                               employee_workload, is_parallel=True)
-            return
-
-        print(f"Найдено {len(available_employees)} сотрудников с должностью '{position}'")
-
-        # Сортируем сотрудников по текущей нагрузке (наименее загруженные первыми)
-        sorted_employees = sorted(
-            available_employees,
-            key=lambda e: employee_workload.get(e['id'], 0)
-        )
-
-        # Проверяем, достаточно ли сотрудников
-        if len(available_employees) < len(subtask_group):
-            print(f"⚠️ ВНИМАНИЕ: Сотрудников ({len(available_employees)}) меньше чем подзадач ({len(subtask_group)})")
-            print(f"Некоторым сотрудникам будет назначено несколько подзадач '{task_name}'")
-
-        # Назначаем каждую подзадачу отдельному сотруднику
-        assigned_employees = set()  # Для отслеживания уже назначенных
-
-        for i, subtask in enumerate(subtask_group):
-            subtask_id = subtask['id']
-            subtask_duration = subtask.get('duration', 1)
+    Разделяет подзадачи на параллельные и последовательные за один проход
 
-            # Выбираем сотрудника
-            if i < len(available_employees):
-                # Есть свободный сотрудник
-                chosen_employee = sorted_employees[i]
-            else:
-                # Сотрудников меньше чем задач - выбираем наименее загруженного из уже назначенных
-                available_for_reuse = [emp for emp in sorted_employees if emp['id'] in assigned_employees]
-                if available_for_reuse:
-                    chosen_employee = min(available_for_reuse, key=lambda e: employee_workload.get(e['id'], 0))
-                else:
-                    chosen_employee = sorted_employees[0]  # Fallback
-
-            chosen_employee_id = chosen_employee['id']
-
-            # Рассчитываем даты с учетом выходных дней сотрудника
-            start_date_str = group_start.strftime('%Y-%m-%d')
-            emp_start, emp_end, _ = get_available_dates_for_task(
-                chosen_employee_id, start_date_str, subtask_duration, employee_manager
-            )
-
-            if emp_start:
-                task_dates[subtask_id] = {
-                    'start': emp_start,
-                    'end': emp_end,
-                    'employee_id': chosen_employee_id
-                }
-
-                # Обновляем нагрузку сотрудника
-                employee_workload[chosen_employee_id] = employee_workload.get(chosen_employee_id, 0) + subtask_duration
-                assigned_employees.add(chosen_employee_id)
-
-                try:
-                    employee_name = chosen_employee['name']
-                    print(f"  ✓ Подзадача '{task_name}' (ID: {subtask_id}) назначена сотруднику {employee_name}")
-                    print(
-                        f"    Даты: {emp_start} - {emp_end}, нагрузка сотрудника: {employee_workload[chosen_employee_id]} дней")
-                except Exception as e:
-                    print(
-                        f"  ✓ Подзадача '{task_name}' (ID: {subtask_id}) назначена сотруднику ID: {chosen_employee_id}")
-            else:
-                # Не удалось рассчитать даты с учетом выходных, используем стандартные
-                end_date = group_start + datetime.timedelta(days=subtask_duration - 1)
-                task_dates[subtask_id] = {
-                    'start': start_date_str,
-                    'end': end_date.strftime('%Y-%m-%d'),
-                    'employee_id': chosen_employee_id
-                }
-
-                employee_workload[chosen_employee_id] = employee_workload.get(chosen_employee_id, 0) + subtask_duration
-                assigned_employees.add(chosen_employee_id)
-
-                print(
-                    f"  ⚠️ Подзадача '{task_name}' (ID: {subtask_id}) назначена сотруднику {chosen_employee_id} без учета выходных")
-
-        # Проверяем результат назначения
-        unique_employees = len(assigned_employees)
-        total_subtasks = len(subtask_group)
-
-        if unique_employees == total_subtasks:
-            print(f"✅ Все {total_subtasks} подзадач '{task_name}' назначены разным сотрудникам")
+    Returns:
+        tuple: (parallel_subtasks, sequential_subtasks) с сохранением исходного порядка
+    """
+    parallel_subtasks = []
+    sequential_subtasks = []
+    for task in subtasks:
+        if task.get('parallel'):
+            parallel_subtasks.append(task)
         else:
-            print(
-                f"⚠️ {total_subtasks} подзадач '{task_name}' назначены {unique_employees} сотрудникам (есть дублирование)")
-
-    except Exception as e:
-        print(f"❌ Ошибка при назначении параллельных подзадач '{task_name}': {str(e)}")
-        # Fallback - назначаем как обычные подзадачи
-        for subtask in subtask_group:
-            assign_subtask(subtask, group_start, task_dates, employee_manager,
-                           employee_workload, is_parallel=True)
+            sequential_subtasks.append(task)
+    return parallel_subtasks, sequential_subtasks
 
 
-def assign_subtask(subtask, start_date, task_dates, employee_manager, employee_workload, is_parallel=True):
+def assign_subtask(subtask, start_date, task_dates, employee_manager, employee_workload, is_parallel=True,
+                   load_heaps=None):
     """
     Назначает подзадачу на сотрудника
+
+    Дата начала передается, а даты начала и окончания возвращаются
+    порядковыми номерами дней.
     """
     subtask_id = subtask['id']
     subtask_duration = subtask.get('duration', 1)
-    position = subtask.get('position')
-    employee_id = subtask.get('employee_id')
-
-    start_date_str = start_date.strftime('%Y-%m-%d')
-
-    if position:
-        # Находим наименее загруженного сотрудника
-        suitable_employees = employee_manager.get_employees_by_position(position)
-
-        if suitable_employees:
-            # Сортируем по нагрузке
-            sorted_employees = sorted(
-                suitable_employees,
-                key=lambda e: employee_workload.get(e['id'], 0)
-            )
-
-            best_employee = sorted_employees[0]
-            best_employee_id = best_employee['id']
-
-            # Рассчитываем даты
-            emp_start, emp_end, _ = get_available_dates_for_task(
-                best_employee_id, start_date_str, subtask_duration, employee_manager
-            )
-
-            if emp_start:
-                task_dates[subtask_id] = {
-                    'start': emp_start,
-                    'end': emp_end,
-                    'employee_id': best_employee_id
-                }
-                employee_workload[best_employee_id] = employee_workload.get(best_employee_id, 0) + subtask_duration
-                print(
-                    f"Подзадача {subtask_id} назначена на {best_employee['name']} (нагрузка: {employee_workload[best_employee_id]})")
 
-                return datetime.datetime.strptime(emp_end, '%Y-%m-%d')
+    # Подзадачи всегда распределяются по должности
+    start, end, employee_id, employee = _resolve_slot(
+        start_date, subtask_duration, None, subtask.get('position'), employee_manager, employee_workload,
+        load_heaps=load_heaps
+    )
 
-    # Если не удалось назначить, используем стандартные даты
-    end_date = start_date + datetime.timedelta(days=subtask_duration - 1)
     task_dates[subtask_id] = {
-        'start': start_date_str,
-        'end': end_date.strftime('%Y-%m-%d')
+        'start': _ordinal_to_str(start),
+        'end': _ordinal_to_str(end)
     }
+    if employee_id:
+        task_dates[subtask_id]['employee_id'] = employee_id
+        logger.debug(
+            "Подзадача %s назначена на %s (нагрузка: %s)", subtask_id, employee['name'], employee_workload[employee_id])
 
-    return end_date
-
-def calculate_task_start_date(task_id, graph, task_dates, project_start_date):
-    """
-    Вычисляет дату начала задачи на основе предшественников
-    """
-    predecessors = graph.get(task_id, [])
-
-    if not predecessors:
-        # Нет предшественников - начинаем с даты начала проекта
-        return datetime.datetime.strptime(project_start_date, '%Y-%m-%d')
+    return start, end
 
-    # Находим самую позднюю дату окончания среди предшественников
-    latest_end_date = None
 
-    for pred_id in predecessors:
-        if pred_id in task_dates and 'end' in task_dates[pred_id]:
-            pred_end = datetime.datetime.strptime(task_dates[pred_id]['end'], '%Y-%m-%d')
-            pred_next_day = pred_end + datetime.timedelta(days=1)
+def _resolve_slot(start_date, duration, employee_id, position, employee_manager, employee_workload,
+                  load_heaps=None):
+    """
+    Подбирает сотрудника и даты для задачи
 
-            if latest_end_date is None or pred_next_day > latest_end_date:
-                latest_end_date = pred_next_day
-
-    if latest_end_date:
-        return latest_end_date
-    else:
-        # Если не удалось определить даты предшественников, используем дату начала проекта
-        return datetime.datetime.strptime(project_start_date, '%Y-%m-%d')
+    Порядок выбора: уже назначенный сотрудник, затем наименее загруженный
+    сотрудник нужной должности, иначе стандартные даты без сотрудника.
+    Нагрузка выбранного сотрудника увеличивается на длительность задачи.
 
+    Args:
+        start_date (int): Порядковый номер дня начала
+        duration (int): Длительность задачи
+        employee_id (int): ID назначенного сотрудника или None
+        position (str): Требуемая должность или None
+        employee_manager: Менеджер сотрудников
+        employee_workload (dict): Текущая нагрузка сотрудников
+        load_heaps (dict): Очереди сотрудников по должностям (см. _least_loaded_employee)
 
-def assign_regular_task(task_id, task, start_date, task_dates, employee_manager,
-                        employee_workload, employee_schedule):
-    """
-    Назначает обычную задачу на сотрудника с балансировкой нагрузки
+    Returns:
+        tuple: (start, end, employee_id, employee) - даты порядковыми номерами дней,
+               ID сотрудника (или None) и словарь сотрудника, выбранного по должности
     """
-    task_duration = task.get('duration', 1)
-    position = task.get('position')
-    employee_id = task.get('employee_id')
-    task_name = task.get('name', f"Задача {task_id}")
+    start_date_str = _ordinal_to_str(start_date)
 
     if employee_id:
         # Уже назначен сотрудник - проверяем его доступность
-        employee_start, employee_end, calendar_duration = get_available_dates_for_task(
-            employee_id, start_date.strftime('%Y-%m-%d'), task_duration, employee_manager
+        employee_start, employee_end, _ = get_available_dates_for_task(
+            employee_id, start_date_str, duration, employee_manager
         )
         if employee_start:
-            task_dates[task_id] = {
-                'start': employee_start,
-                'end': employee_end,
-                'employee_id': employee_id
-            }
-            # Обновляем нагрузку
-            employee_workload[employee_id] = employee_workload.get(employee_id, 0) + task_duration
-            print(f"Задача {task_id}: {task_name} - сохранен назначенный сотрудник {employee_id}")
-            return
+            employee_workload[employee_id] += duration
+            return _date_to_ordinal(employee_start), _date_to_ordinal(employee_end), employee_id, None
 
     if position:
-        # Ищем наименее загруженного сотрудника с нужной должностью
-        suitable_employees = employee_manager.get_employees_by_position(position)
-
-        if suitable_employees:
-            # Сортируем по текущей нагрузке
-            sorted_employees = sorted(
-                suitable_employees,
-                key=lambda e: employee_workload.get(e['id'], 0)
-            )
+        # Выбираем наименее загруженного
+        best_employee = _least_loaded_employee(position, employee_manager, employee_workload, load_heaps)
 
-            # Выбираем наименее загруженного
-            best_employee = sorted_employees[0]
+        if best_employee:
             best_employee_id = best_employee['id']
 
             # Рассчитываем даты с учетом выходных
-            employee_start, employee_end, calendar_duration = get_available_dates_for_task(
-                best_employee_id, start_date.strftime('%Y-%m-%d'), task_duration, employee_manager
+            employee_start, employee_end, _ = get_available_dates_for_task(
+                best_employee_id, start_date_str, duration, employee_manager
             )
-
             if employee_start:
-                task_dates[task_id] = {
-                    'start': employee_start,
-                    'end': employee_end,
-                    'employee_id': best_employee_id
-                }
-                # Обновляем нагрузку
-                employee_workload[best_employee_id] = employee_workload.get(best_employee_id, 0) + task_duration
-                print(
-                    f"Задача {task_id}: {task_name} - назначен сотрудник {best_employee['name']} (нагрузка: {employee_workload[best_employee_id]} дней)")
-                return
+                employee_workload[best_employee_id] += duration
+                return (_date_to_ordinal(employee_start), _date_to_ordinal(employee_end),
+                        best_employee_id, best_employee)
 
     # Если не удалось назначить сотрудника, используем стандартные даты
-    end_date = start_date + datetime.timedelta(days=task_duration - 1)
-    task_dates[task_id] = {
-        'start': start_date.strftime('%Y-%m-%d'),
-        'end': end_date.strftime('%Y-%m-%d')
-    }
-    print(f"Задача {task_id}: {task_name} - не удалось назначить сотрудника")
-
-def calculate_main_tasks_dates(project, sorted_tasks, graph, task_map, task_manager, employee_manager):
-    """
-    Рассчитывает даты только для основных задач (не подзадач)
-    """
-    task_dates = {}
-
-    for task_id in sorted_tasks:
-        if task_id not in task_map:
-            continue
+    return start_date, start_date + duration - 1, None, None
 
-        task = task_map[task_id]
 
-        # Пропускаем подзадачи на этом этапе
-        if task.get('parent_id'):
-            continue
+def _least_loaded_employee(position, employee_manager, employee_workload, load_heaps=None):
+    """
+    Возвращает наименее загруженного сотрудника должности (при равенстве - первого по списку)
 
-        task_name = task.get('name', f"Задача {task_id}")
-        predecessors = graph.get(task_id, [])
-
-        # Определяем дату начала задачи на основе предшественников
-        start_date = None
-        if not predecessors:
-            # Если нет предшественников, начинаем с даты начала проекта
-            start_date = datetime.datetime.strptime(project['start_date'], '%Y-%m-%d')
-            print(f"Задача {task_id}: {task_name} - начало с даты начала проекта: {start_date.strftime('%Y-%m-%d')}")
-        else:
-            # Определяем дату начала на основе самой поздней даты окончания предшественников
-            latest_end_date = None
-            for pred_id in predecessors:
-                if pred_id in task_dates and 'end' in task_dates[pred_id]:
-                    pred_end = datetime.datetime.strptime(task_dates[pred_id]['end'], '%Y-%m-%d')
-                    pred_next_day = pred_end + datetime.timedelta(days=1)
-                    if latest_end_date is None or pred_next_day > latest_end_date:
-                        latest_end_date = pred_next_day
-
-            if latest_end_date:
-                start_date = latest_end_date
-            else:
-                start_date = datetime.datetime.strptime(project['start_date'], '%Y-%m-%d')
+    Без load_heaps сотрудники просматриваются целиком. С load_heaps для каждой
+    должности один раз строится куча (нагрузка, порядок, сотрудник); нагрузка
+    в пределах одного планирования только растет, поэтому устаревшие записи
+    обновляются лениво при извлечении, а выбор стоит O(log E) вместо O(E).
 
-        # Вычисляем дату окончания и сохраняем в task_dates
-        task_duration = task.get('duration', 1)
+    Returns:
+        dict: Словарь сотрудника или None, если сотрудников должности нет
+    """
+    if load_heaps is None:
+        suitable_employees = get_employees_by_position(position, employee_manager)
+        if not suitable_employees:
+            return None
+        return min(suitable_employees, key=lambda e: employee_workload.get(e['id'], 0))
+
+    heap = load_heaps.get(position)
+    if heap is None:
+        heap = [(employee_workload.get(employee['id'], 0), order, employee)
+                for order, employee in enumerate(get_employees_by_position(position, employee_manager))]
+        heapq.heapify(heap)
+        load_heaps[position] = heap
+
+    while heap:
+        load, order, employee = heap[0]
+        current_load = employee_workload.get(employee['id'], 0)
+        if load == current_load:
+            return employee
+        # Нагрузка изменилась после помещения в кучу - переставляем запись
+        heapq.heapreplace(heap, (current_load, order, employee))
+
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _parse_date(date_str):
+    """
+    Разбирает дату 'YYYY-MM-DD' в datetime.date с кэшированием
 
-        if task.get('is_group'):
-            # Для групповой задачи устанавливаем предварительные даты
-            end_date = start_date + datetime.timedelta(days=task_duration - 1)
-            task_dates[task_id] = {
-                'start': start_date.strftime('%Y-%m-%d'),
-                'end': end_date.strftime('%Y-%m-%d')
-            }
-            print(
-                f"Групповая задача {task_id}: {task_name} - предварительные даты: {start_date.strftime('%Y-%m-%d')} - {end_date.strftime('%Y-%m-%d')}")
-        else:
-            # Для обычной задачи назначаем сотрудника и учитываем выходные дни
-            employee_id = task.get('employee_id')
-            position = task.get('position')
-
-            if employee_id:
-                # Проверяем доступность сотрудника
-                employee_start, employee_end, calendar_duration = get_available_dates_for_task(
-                    employee_id, start_date.strftime('%Y-%m-%d'), task_duration, employee_manager
-                )
-                if employee_start:
-                    task_dates[task_id] = {
-                        'start': employee_start,
-                        'end': employee_end,
-                        'employee_id': employee_id
-                    }
-                    print(
-                        f"Задача {task_id}: {task_name} - назначен сотрудник {employee_id}, даты: {employee_start} - {employee_end}")
-                else:
-                    # Не удалось назначить сотрудника, используем стандартные даты
-                    end_date = start_date + datetime.timedelta(days=task_duration - 1)
-                    task_dates[task_id] = {
-                        'start': start_date.strftime('%Y-%m-%d'),
-                        'end': end_date.strftime('%Y-%m-%d'),
-                        'employee_id': employee_id
-                    }
-            elif position:
-                # Ищем подходящего сотрудника
-                new_employee_id, new_start, new_end, new_duration = find_suitable_employee(
-                    position, start_date.strftime('%Y-%m-%d'), task_duration, employee_manager
-                )
-                if new_employee_id:
-                    task_dates[task_id] = {
-                        'start': new_start,
-                        'end': new_end,
-                        'employee_id': new_employee_id
-                    }
-                    print(
-                        f"Задача {task_id}: {task_name} - назначен новый сотрудник {new_employee_id}, даты: {new_start} - {new_end}")
-                else:
-                    # Используем стандартные даты
-                    end_date = start_date + datetime.timedelta(days=task_duration - 1)
-                    task_dates[task_id] = {
-                        'start': start_date.strftime('%Y-%m-%d'),
-                        'end': end_date.strftime('%Y-%m-%d')
-                    }
-            else:
-                # Ни сотрудник, ни должность не указаны
-                end_date = start_date + datetime.timedelta(days=task_duration - 1)
-                task_dates[task_id] = {
-                    'start': start_date.strftime('%Y-%m-%d'),
-                    'end': end_date.strftime('%Y-%m-%d')
-                }
+    Время суток в планировании не используется, поэтому достаточно date
+    (см. parse_iso_date - даты без ведущих нулей тоже принимаются). Одни и те же
+    даты повторяются у множества задач, а date неизменяем, поэтому результат
+    разбора можно переиспользовать.
+    """
+    return parse_iso_date(date_str)
 
-    return task_dates
 
-def process_all_subtasks_unified(task_dates, task_map, task_manager, employee_manager):
-    """
-    Унифицированная обработка всех подзадач с правильной синхронизацией дат
+@lru_cache(maxsize=4096)
+def _date_to_ordinal(date_str):
     """
-    print("Унифицированная обработка подзадач...")
+    Преобразует дату 'YYYY-MM-DD' в порядковый номер дня
 
-    # Словарь для отслеживания загрузки сотрудников
-    employee_workload = {}
+    Даты окончания предшественников, критического пути и проекта читаются
+    многократно, поэтому порядковый номер кэшируется по строке даты.
+    """
+    return _parse_date(date_str).toordinal()
 
-    # Находим все групповые задачи
-    group_tasks = {}
-    for task_id, task in task_map.items():
-        if task.get('is_group'):
-            group_tasks[str(task_id)] = task
 
-    print(f"Найдено {len(group_tasks)} групповых задач для обработки подзадач")
+@lru_cache(maxsize=4096)
+def _ordinal_to_str(ordinal):
+    """Преобразует порядковый номер дня обратно в строку 'YYYY-MM-DD'"""
+    return datetime.date.fromordinal(ordinal).isoformat()
 
-    # Для каждой групповой задачи обрабатываем ее подзадачи
-    for group_id, group_task in group_tasks.items():
-        if group_id not in task_dates:
-            continue
 
-        group_start_str = task_dates[group_id]['start']
-        group_end_str = task_dates[group_id]['end']
+def _format_date(value):
+    """Форматирует date/datetime в строку 'YYYY-MM-DD' (кэш по порядковому номеру дня)"""
+    return _ordinal_to_str(value.toordinal())
 
-        group_start = datetime.datetime.strptime(group_start_str, '%Y-%m-%d')
-        group_end = datetime.datetime.strptime(group_end_str, '%Y-%m-%d')
 
-        print(
-            f"Обработка групповой задачи {group_id}: {group_task.get('name', 'Без имени')} ({group_start_str} - {group_end_str})")
+def calculate_task_start_date(task_id, graph, task_dates, project_start_date):
+    """
+    Вычисляет дату начала задачи на основе предшественников
 
-        # Получаем все подзадачи данной групповой задачи
-        subtasks = get_all_subtasks_for_group(group_id, task_map, task_manager)
+    Returns:
+        int: Порядковый номер дня начала задачи (date.toordinal())
+    """
+    # Задача начинается на следующий день после самого позднего окончания предшественников
+    latest_end_date = max(
+        (_date_to_ordinal(task_dates[pred_id]['end']) for pred_id in graph.get(task_id, ())
+         if 'end' in task_dates.get(pred_id, ())),
+        default=None
+    )
+    if latest_end_date is not None:
+        return latest_end_date + 1
 
-        if not subtasks:
-            print(f"Не найдено подзадач для групповой задачи {group_id}")
-            continue
+    # Нет предшественников или их даты не определены - начинаем с даты начала проекта
+    return _date_to_ordinal(project_start_date)
 
-        print(f"Найдено {len(subtasks)} подзадач для групповой задачи {group_id}")
 
-        # Разделяем подзадачи на параллельные и последовательные
-        parallel_subtasks = [task for task in subtasks if task.get('parallel')]
-        sequential_subtasks = [task for task in subtasks if not task.get('parallel')]
+def assign_regular_task(task_id, task, start_date, task_dates, employee_manager,
+                        employee_workload, load_heaps=None):
+    """
+    Назначает обычную задачу на сотрудника с балансировкой нагрузки
 
-        print(f"Параллельных подзадач: {len(parallel_subtasks)}, последовательных: {len(sequential_subtasks)}")
+    Дата начала передается порядковым номером дня.
+    """
+    task_name = task.get('name', f"Задача {task_id}")
 
-        # Обрабатываем параллельные подзадачи
-        if parallel_subtasks:
-            process_parallel_subtasks(parallel_subtasks, group_start, group_end, task_dates, employee_manager,
-                                      employee_workload)
+    start, end, employee_id, employee = _resolve_slot(
+        start_date, task.get('duration', 1), task.get('employee_id'), task.get('position'),
+        employee_manager, employee_workload, load_heaps
+    )
 
-        # Обрабатываем последовательные подзадачи
-        if sequential_subtasks:
-            process_sequential_subtasks(sequential_subtasks, group_start, group_end, task_dates, employee_manager,
-                                        employee_workload)
+    task_dates[task_id] = {
+        'start': _ordinal_to_str(start),
+        'end': _ordinal_to_str(end)
+    }
 
-        # Обновляем даты групповой задачи на основе подзадач
-        update_group_task_dates(group_id, subtasks, task_dates)
+    if employee_id is None:
+        logger.debug("Задача %s: %s - не удалось назначить сотрудника", task_id, task_name)
+        return
 
-    return task_dates
+    task_dates[task_id]['employee_id'] = employee_id
+    if employee is None:
+        logger.debug("Задача %s: %s - сохранен назначенный сотрудник %s", task_id, task_name, employee_id)
+    else:
+        logger.debug("Задача %s: %s - назначен сотрудник %s (нагрузка: %s дней)",
+                     task_id, task_name, employee['name'], employee_workload[employee_id])
 
 
-def get_all_subtasks_for_group(group_id, task_map, task_manager):
-    """
-    Получает все подзадачи для групповой задачи из разных источников
+def prefetch_group_subtasks(group_ids, task_manager):
     """
-    subtasks = []
+    Загружает подзадачи всех групповых задач одним запросом к БД
 
-    # Проверяем task_map
-    for task_id, task in task_map.items():
-        parent_id = task.get('parent_id')
-        if parent_id and (str(parent_id) == str(group_id) or parent_id == int(group_id)):
-            subtasks.append(task)
+    Args:
+        group_ids: ID групповых задач (например, ключи group_tasks из index_task_map)
+        task_manager: Менеджер задач
+
+    Returns:
+        dict: ID групповой задачи -> список подзадач или None в случае ошибки
+    """
+    group_ids = {int(group_id) for group_id in group_ids}
+    if not group_ids:
+        return {}
 
-    # Проверяем базу данных
     try:
-        db_subtasks = task_manager.get_subtasks(int(group_id))
-        for subtask in db_subtasks:
-            subtask_id = subtask.get('id')
-            if not any(st.get('id') == subtask_id for st in subtasks):
-                subtasks.append(subtask)
-                task_map[subtask_id] = subtask
+        return task_manager.get_subtasks_bulk(sorted(group_ids))
     except Exception as e:
-        print(f"Ошибка при получении подзадач из БД: {str(e)}")
+        logger.error("Ошибка при получении подзадач из БД: %s", e)
+        return None
 
-    return subtasks
 
-def process_parallel_subtasks(parallel_subtasks, group_start, group_end, task_dates, employee_manager,
-                              employee_workload):
-    """
-    Обрабатывает параллельные подзадачи
+def index_task_map(task_map):
     """
-    print(f"Обработка {len(parallel_subtasks)} параллельных подзадач")
-
-    for subtask in parallel_subtasks:
-        subtask_id = subtask['id']
-        subtask_duration = subtask.get('duration', 1)
-        subtask_position = subtask.get('position')
-        employee_id = subtask.get('employee_id')
+    За один проход по task_map находит групповые задачи и строит индекс подзадач
 
-        start_date_str = group_start.strftime('%Y-%m-%d')
+    Ключ индекса - строковый ID родителя, поэтому числовые и строковые parent_id
+    попадают в один список. Задача, доступная в task_map по двум ключам,
+    попадает в индекс дважды, как и при полном просмотре task_map.
 
-        if employee_id:
-            # Проверяем доступность назначенного сотрудника
-            avail_start, avail_end, _ = get_available_dates_for_task(
-                employee_id, start_date_str, subtask_duration, employee_manager
-            )
-            if avail_start:
-                task_dates[subtask_id] = {
-                    'start': avail_start,
-                    'end': avail_end,
-                    'employee_id': employee_id
-                }
-                employee_workload[employee_id] = employee_workload.get(employee_id, 0) + subtask_duration
-                print(f"Параллельная подзадача {subtask_id}: сохранен назначенный сотрудник {employee_id}")
-            else:
-                # Сотрудник недоступен, используем стандартные даты
-                end_date = group_start + datetime.timedelta(days=subtask_duration - 1)
-                task_dates[subtask_id] = {
-                    'start': start_date_str,
-                    'end': end_date.strftime('%Y-%m-%d'),
-                    'employee_id': employee_id
-                }
-        elif subtask_position:
-            # Ищем подходящего сотрудника
-            new_employee_id, new_start, new_end, new_duration = find_suitable_employee(
-                subtask_position, start_date_str, subtask_duration, employee_manager, employee_workload
-            )
-            if new_employee_id:
-                task_dates[subtask_id] = {
-                    'start': new_start,
-                    'end': new_end,
-                    'employee_id': new_employee_id
-                }
-                print(f"Параллельная подзадача {subtask_id}: назначен сотрудник {new_employee_id}")
-            else:
-                # Не нашли сотрудника
-                end_date = group_start + datetime.timedelta(days=subtask_duration - 1)
-                task_dates[subtask_id] = {
-                    'start': start_date_str,
-                    'end': end_date.strftime('%Y-%m-%d')
-                }
-        else:
-            # Нет ни сотрудника, ни должности
-            end_date = group_start + datetime.timedelta(days=subtask_duration - 1)
-            task_dates[subtask_id] = {
-                'start': start_date_str,
-                'end': end_date.strftime('%Y-%m-%d')
-            }
-
-def process_sequential_subtasks(sequential_subtasks, group_start, group_end, task_dates, employee_manager,
-                                employee_workload):
-    """
-    Обрабатывает последовательные подзадачи
+    Returns:
+        tuple: (group_tasks, children_index) - групповые задачи по строковому ID
+               и defaultdict str(parent_id) -> список подзадач
     """
-    print(f"Обработка {len(sequential_subtasks)} последовательных подзадач")
-
-    current_date = group_start
-
-    for subtask in sequential_subtasks:
-        subtask_id = subtask['id']
-        subtask_duration = subtask.get('duration', 1)
-        subtask_position = subtask.get('position')
-        employee_id = subtask.get('employee_id')
-
-        start_date_str = current_date.strftime('%Y-%m-%d')
+    group_tasks = {}
+    children_index = defaultdict(list)
+    for task_id, task in task_map.items():
+        if task.get('is_group'):
+            group_tasks[str(task_id)] = task
+        parent_id = task.get('parent_id')
+        if parent_id:
+            children_index[str(parent_id)].append(task)
+    return group_tasks, children_index
 
-        if employee_id:
-            # Проверяем доступность назначенного сотрудника
-            avail_start, avail_end, calendar_duration = get_available_dates_for_task(
-                employee_id, start_date_str, subtask_duration, employee_manager
-            )
-            if avail_start:
-                task_dates[subtask_id] = {
-                    'start': avail_start,
-                    'end': avail_end,
-                    'employee_id': employee_id
-                }
-                employee_workload[employee_id] = employee_workload.get(employee_id, 0) + subtask_duration
-                # Следующая подзадача начинается после текущей
-                next_date = datetime.datetime.strptime(avail_end, '%Y-%m-%d') + datetime.timedelta(days=1)
-                current_date = next_date
-                print(
-                    f"Последовательная подзадача {subtask_id}: сотрудник {employee_id}, даты: {avail_start} - {avail_end}")
-            else:
-                # Сотрудник недоступен, используем стандартные даты
-                end_date = current_date + datetime.timedelta(days=subtask_duration - 1)
-                task_dates[subtask_id] = {
-                    'start': start_date_str,
-                    'end': end_date.strftime('%Y-%m-%d'),
-                    'employee_id': employee_id
-                }
-                current_date = end_date + datetime.timedelta(days=1)
-        elif subtask_position:
-            # Ищем подходящего сотрудника
-            new_employee_id, new_start, new_end, new_duration = find_suitable_employee(
-                subtask_position, start_date_str, subtask_duration, employee_manager, employee_workload
-            )
-            if new_employee_id:
-                task_dates[subtask_id] = {
-                    'start': new_start,
-                    'end': new_end,
-                    'employee_id': new_employee_id
-                }
-                next_date = datetime.datetime.strptime(new_end, '%Y-%m-%d') + datetime.timedelta(days=1)
-                current_date = next_date
-                print(f"Последовательная подзадача {subtask_id}: назначен сотрудник {new_employee_id}")
-            else:
-                # Не нашли сотрудника
-                end_date = current_date + datetime.timedelta(days=subtask_duration - 1)
-                task_dates[subtask_id] = {
-                    'start': start_date_str,
-                    'end': end_date.strftime('%Y-%m-%d')
-                }
-                current_date = end_date + datetime.timedelta(days=1)
-        else:
-            # Нет ни сотрудника, ни должности
-            end_date = current_date + datetime.timedelta(days=subtask_duration - 1)
-            task_dates[subtask_id] = {
-                'start': start_date_str,
-                'end': end_date.strftime('%Y-%m-%d')
-            }
-            current_date = end_date + datetime.timedelta(days=1)
 
-def update_group_task_dates(group_id, subtasks, task_dates):
-    """
-    Обновляет даты групповой задачи на основе подзадач
+def subtask_ids_by_parent(task_map):
     """
-    if not subtasks:
-        return
-
-    earliest_start = None
-    latest_end = None
-
-    for subtask in subtasks:
-        subtask_id = subtask['id']
-
-        if subtask_id in task_dates:
-            subtask_start_str = task_dates[subtask_id].get('start')
-            subtask_end_str = task_dates[subtask_id].get('end')
-
-            if subtask_start_str and subtask_end_str:
-                subtask_start = datetime.datetime.strptime(subtask_start_str, '%Y-%m-%d')
-                subtask_end = datetime.datetime.strptime(subtask_end_str, '%Y-%m-%d')
-
-                if earliest_start is None or subtask_start < earliest_start:
-                    earliest_start = subtask_start
-
-                if latest_end is None or subtask_end > latest_end:
-                    latest_end = subtask_end
+    За один проход по task_map строит соответствие родитель -> ID подзадач
 
-    # Обновляем даты групповой задачи
-    if earliest_start and latest_end and group_id in task_dates:
-        task_dates[group_id]['start'] = earliest_start.strftime('%Y-%m-%d')
-        task_dates[group_id]['end'] = latest_end.strftime('%Y-%m-%d')
-
-def final_parent_subtask_sync(task_dates, task_map, task_manager, employee_manager):
-    """
-    Финальная синхронизация дат родительских задач и подзадач (выполняется один раз)
+    Returns:
+        dict: str(parent_id) -> список строковых ID подзадач (в порядке task_map)
     """
-    print("Финальная синхронизация родителей и подзадач...")
-
-    # Создаем мапинг родитель -> подзадачи
     parent_to_subtasks = {}
     for task_id, task in task_map.items():
         parent_id = task.get('parent_id')
         if parent_id:
-            parent_id_str = str(parent_id)
-            if parent_id_str not in parent_to_subtasks:
-                parent_to_subtasks[parent_id_str] = []
-            parent_to_subtasks[parent_id_str].append(str(task_id))
-
-    # Обновляем каждую родительскую задачу на основе ее подзадач
-    for parent_id, subtask_ids in parent_to_subtasks.items():
-        if parent_id not in task_dates:
-            continue
-
-        earliest_start = None
-        latest_end = None
-
-        for subtask_id in subtask_ids:
-            if subtask_id in task_dates:
-                subtask_start_str = task_dates[subtask_id].get('start')
-                subtask_end_str = task_dates[subtask_id].get('end')
+            parent_to_subtasks.setdefault(str(parent_id), []).append(str(task_id))
+    return parent_to_subtasks
 
-                if subtask_start_str and subtask_end_str:
-                    try:
-                        subtask_start = datetime.datetime.strptime(subtask_start_str, '%Y-%m-%d')
-                        subtask_end = datetime.datetime.strptime(subtask_end_str, '%Y-%m-%d')
 
-                        if earliest_start is None or subtask_start < earliest_start:
-                            earliest_start = subtask_start
-
-                        if latest_end is None or subtask_end > latest_end:
-                            latest_end = subtask_end
-                    except ValueError as e:
-                        print(f"Ошибка при обработке дат подзадачи {subtask_id}: {str(e)}")
-
-        # Обновляем родительскую задачу
-        if earliest_start and latest_end:
-            old_start = task_dates[parent_id].get('start')
-            old_end = task_dates[parent_id].get('end')
-
-            new_start = earliest_start.strftime('%Y-%m-%d')
-            new_end = latest_end.strftime('%Y-%m-%d')
-
-            if old_start != new_start or old_end != new_end:
-                task_dates[parent_id]['start'] = new_start
-                task_dates[parent_id]['end'] = new_end
-                print(
-                    f"Финальное обновление родительской задачи {parent_id}: {old_start}-{old_end} -> {new_start}-{new_end}")
-
-    return task_dates
-
-def validate_dependencies_final(task_dates, graph, task_map, task_manager, employee_manager):
-    """
-    Финальная проверка зависимостей (выполняется один раз в конце)
+def get_all_subtasks_for_group(group_id, task_map, task_manager, subtasks_cache=None, children_index=None):
     """
-    print("Финальная проверка зависимостей...")
-
-    # Создаем обратный граф (для поиска зависимых задач)
-    reverse_graph = defaultdict(list)
-    for task_id, predecessors in graph.items():
-        for pred_id in predecessors:
-            reverse_graph[pred_id].append(task_id)
-
-    # Ищем нарушения зависимостей
-    violations = []
-
-    for task_id in reverse_graph:
-        if task_id not in task_dates or 'end' not in task_dates[task_id]:
-            continue
-
-        end_date_str = task_dates[task_id]['end']
-        end_date = datetime.datetime.strptime(end_date_str, '%Y-%m-%d')
-
-        for dependent_id in reverse_graph[task_id]:
-            if dependent_id not in task_dates or 'start' not in task_dates[dependent_id]:
-                continue
-
-            dependent_start_str = task_dates[dependent_id]['start']
-            dependent_start = datetime.datetime.strptime(dependent_start_str, '%Y-%m-%d')
-
-            if dependent_start <= end_date:
-                violations.append((task_id, dependent_id, end_date, dependent_start))
-
-    # Исправляем нарушения
-    for pred_id, dep_id, pred_end, dep_start in violations:
-        new_start = pred_end + datetime.timedelta(days=1)
-        new_start_str = new_start.strftime('%Y-%m-%d')
-
-        task = task_map.get(dep_id)
-        if not task:
-            continue
+    Получает все подзадачи для групповой задачи из разных источников
 
-        task_duration = task.get('duration', 1)
-        employee_id = task.get('employee_id') or task_dates.get(dep_id, {}).get('employee_id')
-        position = task.get('position')
+    Args:
+        subtasks_cache (dict): Подзадачи, заранее загруженные через prefetch_group_subtasks
+        children_index (dict): Индекс подзадач из index_task_map
+    """
+    if children_index is None:
+        _, children_index = index_task_map(task_map)
 
-        # Пересчитываем даты с учетом выходных дней
-        if employee_id:
-            emp_start, emp_end, _ = get_available_dates_for_task(
-                employee_id, new_start_str, task_duration, employee_manager
-            )
-            if emp_start:
-                task_dates[dep_id]['start'] = emp_start
-                task_dates[dep_id]['end'] = emp_end
-                print(f"Исправлено нарушение зависимости: задача {dep_id} перенесена на {emp_start} - {emp_end}")
-                continue
+    # Проверяем task_map
+    subtasks = list(children_index.get(str(group_id), []))
+    known_ids = {st.get('id') for st in subtasks}
 
-        # Если не удалось учесть выходные, используем стандартный расчет
-        new_end = new_start + datetime.timedelta(days=task_duration - 1)
-        task_dates[dep_id]['start'] = new_start_str
-        task_dates[dep_id]['end'] = new_end.strftime('%Y-%m-%d')
-        print(
-            f"Исправлено нарушение зависимости: задача {dep_id} перенесена на {new_start_str} - {new_end.strftime('%Y-%m-%d')}")
+    # Проверяем базу данных
+    try:
+        if subtasks_cache is not None and int(group_id) in subtasks_cache:
+            db_subtasks = subtasks_cache[int(group_id)]
+        else:
+            db_subtasks = task_manager.get_subtasks(int(group_id))
+        for subtask in db_subtasks:
+            subtask_id = subtask.get('id')
+            if subtask_id not in known_ids:
+                known_ids.add(subtask_id)
+                subtasks.append(subtask)
+                task_map[subtask_id] = subtask
+                children_index[str(group_id)].append(subtask)
+    except Exception as e:
+        logger.error("Ошибка при получении подзадач из БД: %s", e)
 
-    return task_dates
+    return subtasks
 
 # def process_subtasks(task_dates, task_map, graph, task_manager, employee_manager):
 #     """
@@ -2023,744 +1677,404 @@ def validate_dependencies_final(task_dates, graph, task_map, task_manager, emplo
 #                                                             '%Y-%m-%d') + datetime.timedelta(days=1)
 #                     updates_needed.append((next_dependent_id, next_start.strftime('%Y-%m-%d')))
 
-def balance_employee_workload(task_dates, task_map, employee_manager):
+def build_dependency_graph(tasks, task_manager):
     """
-    Балансирует нагрузку между сотрудниками одной должности,
-    предотвращая дублирование назначений на идентичные подзадачи
+    Строит граф зависимостей между задачами
 
     Args:
-        task_dates (dict): Словарь с датами и назначениями задач
-        task_map (dict): Словарь задач по ID
-        employee_manager: Менеджер сотрудников
+        tasks (list): Список задач
+        task_manager: Менеджер задач
 
     Returns:
-        dict: Обновленный словарь task_dates с более сбалансированной нагрузкой
+        tuple: (graph, task_map) - граф зависимостей и словарь задач по ID
     """
-    import datetime
+    # Инициализируем граф и словарь задач
+    graph = {}  # task_id -> список ID предшественников
+    task_map = {}  # task_id -> task
 
-    print("Запуск балансировки нагрузки сотрудников...")
+    # Создаем словарь задач по ID для быстрого доступа
+    for task in tasks:
+        task_id = task['id']
+        task_id_str = str(task_id)
+        graph[task_id_str] = []
+        task_map[task_id_str] = task
+        # Также добавим отображение числового ID на строковый
+        if task_id != task_id_str:
+            task_map[task_id] = task
 
-    # Собираем текущую нагрузку по сотрудникам и должностям
-    employee_workload = {}  # employee_id -> рабочих дней
-    position_employees = {}  # должность -> список сотрудников
+    # Создаем словари задач по ID и по имени для поиска предшественников
+    tasks_by_id = {}
+    tasks_by_name = {}
+    for task in tasks:
+        tasks_by_id.setdefault(str(task['id']), task)
+        task_name = task.get('name')
+        if task_name:
+            tasks_by_name[task_name] = str(task['id'])
 
-    # Словарь для отслеживания задач каждого сотрудника
-    employee_tasks = {}  # employee_id -> список (task_id, task, duration)
+    # Получаем зависимости всех задач из базы данных одним запросом
+    deps_by_task = defaultdict(list)
+    try:
+        for dep_task_id, predecessor_id in task_manager.get_all_dependencies([task['id'] for task in tasks]):
+            deps_by_task[str(dep_task_id)].append(str(predecessor_id))
+    except Exception as e:
+        logger.error("Ошибка при получении зависимостей из БД: %s", e)
 
-    # Создаем структуры для отслеживания подзадач одного типа с учетом должности
-    # Ключ: (parent_id, name, position, timeframe) -> Значение: список назначенных сотрудников
-    similar_subtask_assignments = {}
+    # Заполняем граф зависимостями
+    for task in tasks:
+        task_id = str(task['id'])
 
-    # Структура для отслеживания групповых задач и их подзадач
-    group_tasks = {}  # group_id -> list of subtask_ids
-    subtask_to_group = {}  # subtask_id -> group_id
+        # Получаем зависимости из поля predecessors и добавляем зависимости из базы данных
+        predecessors = _normalize_predecessors(task, tasks_by_name)
+        predecessors.extend(deps_by_task.get(task_id, ()))
 
-    # Шаг 1: Получаем все должности из конфигурации
-    all_positions = set()
-    try:
-        from data.config import Config
-        all_positions = set(Config.POSITIONS)
-        print(f"Получены все должности из конфигурации: {all_positions}")
-    except Exception as e:
-        print(f"Ошибка при получении списка должностей: {str(e)}")
-        # В случае неудачи, получаем должности из сотрудников
-        try:
-            all_employees = employee_manager.get_all_employees()
-            all_positions = set(emp.get('position') for emp in all_employees if emp.get('position'))
-            print(f"Получены должности из списка сотрудников: {all_positions}")
-        except:
-            print("Не удалось получить список должностей")
+        # Добавляем зависимости в граф (dict.fromkeys убирает повторы, сохраняя порядок)
+        for pred_id_str in dict.fromkeys(predecessors):
+            if pred_id_str not in graph:
+                graph[pred_id_str] = []
+                # Пытаемся найти задачу с таким ID
+                pred_task = tasks_by_id.get(pred_id_str)
+                if pred_task:
+                    task_map[pred_id_str] = pred_task
 
-    # Шаг 2: Для каждой должности получаем всех доступных сотрудников
-    all_available_employees = {}  # должность -> список сотрудников
-    for position in all_positions:
-        try:
-            employees = employee_manager.get_employees_by_position(position)
-            if employees:
-                all_available_employees[position] = employees
-                position_employees[position] = [emp['id'] for emp in employees]
-
-                # Инициализируем словари для всех сотрудников
-                for emp in employees:
-                    emp_id = emp['id']
-                    if emp_id not in employee_workload:
-                        employee_workload[emp_id] = 0
-                        employee_tasks[emp_id] = []
-
-                print(f"Должность '{position}': найдено {len(employees)} сотрудников")
-        except Exception as e:
-            print(f"Ошибка при получении сотрудников для должности '{position}': {str(e)}")
+            graph[task_id].append(pred_id_str)
 
-    # Шаг 3: Анализируем текущие назначения и идентифицируем групповые задачи и подзадачи
-    for task_id, dates in task_dates.items():
+    return graph, task_map
+
+def _normalize_predecessors(task, tasks_by_name):
+    """
+    Приводит поле predecessors задачи к списку строковых ID
+
+    Поле может быть списком, JSON-строкой или строкой через запятую с ID
+    или именами задач. Разбор строк кэшируется в _parse_predecessors_string,
+    поэтому повторные вызовы для одинаковых значений не разбирают JSON заново.
+
+    Args:
+        task (dict): Задача
+        tasks_by_name (dict): Имя задачи -> строковый ID
+
+    Returns:
+        list: Строковые ID предшественников (возможны повторы)
+    """
+    value = task.get('predecessors')
+    if not value:
+        return []
+
+    if isinstance(value, list):
+        return [str(pred) for pred in value if isinstance(pred, (int, str))]
+
+    if not isinstance(value, str):
+        return []
+
+    tokens, from_csv = _parse_predecessors_string(value)
+    if not from_csv:
+        return list(tokens)
+
+    # Элементы списка через запятую - это ID или имена задач
+    predecessors = []
+    for pred in tokens:
+        if pred.isdigit():
+            predecessors.append(pred)
+        elif pred in tasks_by_name:
+            predecessors.append(tasks_by_name[pred])
+    return predecessors
+
+
+@lru_cache(maxsize=1024)
+def _parse_predecessors_string(value):
+    """
+    Разбирает строковое поле predecessors
+
+    JSON разбирается только для строк, начинающихся с '[', остальные строки
+    сразу делятся по запятым. Одинаковые строки разбираются один раз.
+
+    Args:
+        value (str): Значение поля predecessors
+
+    Returns:
+        tuple: (tokens, from_csv) - элементы списка и признак того, что они
+               получены разбиением по запятым (их нужно искать по ID или имени)
+    """
+    if value.lstrip().startswith('['):
         try:
-            # Преобразуем task_id в числовой формат, если это строка
-            task_id_num = int(task_id) if isinstance(task_id, str) and task_id.isdigit() else task_id
+            pred_list = json.loads(value)
+        except json.JSONDecodeError:
+            pred_list = None
+        if isinstance(pred_list, list):
+            return tuple(str(pred) for pred in pred_list if isinstance(pred, (int, str))), False
 
-            # Получаем информацию о задаче
-            task = None
-            try:
-                # Пробуем разные варианты поиска задачи в task_map
-                if str(task_id) in task_map:
-                    task = task_map[str(task_id)]
-                elif task_id in task_map:
-                    task = task_map[task_id]
-                elif isinstance(task_id, str) and task_id.isdigit() and int(task_id) in task_map:
-                    task = task_map[int(task_id)]
-            except Exception as e:
-                print(f"Ошибка при поиске задачи {task_id}: {str(e)}")
-                continue
+    if ',' in value:
+        return tuple(pred.strip() for pred in value.split(',')), True
 
-            if not task:
-                print(f"Не найдена задача с ID {task_id} в task_map")
-                continue
+    return (), False
 
-            # Отслеживаем групповые задачи и подзадачи
-            if task.get('is_group'):
-                group_tasks[task_id] = []
-
-            # Если это подзадача, добавляем в соответствующую группу
-            parent_id = task.get('parent_id')
-            if parent_id:
-                parent_id_str = str(parent_id)
-                if parent_id_str in group_tasks:
-                    group_tasks[parent_id_str].append(task_id)
-                elif parent_id in group_tasks:
-                    group_tasks[parent_id].append(task_id)
-
-                # Запоминаем к какой группе относится подзадача
-                subtask_to_group[task_id] = parent_id
-
-            # Отслеживаем назначения сотрудников
-            employee_id = dates.get('employee_id')
-            if not employee_id:
-                continue
 
-            # Получаем длительность задачи
-            task_duration = task.get('duration', 1)
+def topological_sort(graph, successors=None):
+    """
+    Выполняет топологическую сортировку задач (алгоритм Кана)
+
+    Полустепень захода задачи - число ее предшественников в graph, обход идет
+    по списку зависимых задач, поэтому порядок сразу получается от начала
+    проекта к концу. Задачи с равным приоритетом выдаются в порядке графа,
+    так что результат не зависит от порядка обхода множеств.
 
-            # Суммируем нагрузку для сотрудника
-            if employee_id not in employee_workload:
-                employee_workload[employee_id] = 0
-                employee_tasks[employee_id] = []
+    Args:
+        graph (dict): Граф зависимостей (задача -> список предшественников)
+        successors (dict): Зависимые задачи (см. build_successors), если уже построены
+
+    Returns:
+        list: ID задач в топологическом порядке
 
-            employee_workload[employee_id] += task_duration
-            employee_tasks[employee_id].append((task_id, task, task_duration))
+    Raises:
+        CycleError: Если в графе есть циклы
+    """
+    # Добавляем предшественников, даже если они не в исходном списке задач
+    for predecessors in list(graph.values()):
+        for pred in predecessors:
+            if pred not in graph:
+                graph[pred] = []
+
+    if successors is None:
+        successors = build_successors(graph)
+
+    in_degree = {node: len(predecessors) for node, predecessors in graph.items()}
+    queue = deque(node for node, degree in in_degree.items() if degree == 0)
+    result = []
+
+    while queue:
+        node = queue.popleft()
+        result.append(node)
 
-            # ИЗМЕНЕНИЕ: Для подзадач создаем ключ с учетом должности
-            if parent_id:
-                task_name = task.get('name', '')
-                position = task.get('position', '')  # Добавляем позицию
-                timeframe = f"{dates.get('start')}-{dates.get('end')}"
-                subtask_key = (str(parent_id), task_name, position, timeframe)
+        for dependent in successors.get(node, ()):
+            in_degree[dependent] -= 1
+            if in_degree[dependent] == 0:
+                queue.append(dependent)
 
-                if subtask_key not in similar_subtask_assignments:
-                    similar_subtask_assignments[subtask_key] = []
+    # Необработанные задачи лежат на циклах или зависят от них
+    if len(result) != len(graph):
+        raise CycleError(_find_cycles(graph, [node for node, degree in in_degree.items() if degree > 0]))
 
-                if employee_id not in similar_subtask_assignments[subtask_key]:
-                    similar_subtask_assignments[subtask_key].append(employee_id)
+    return result
 
-            # Получаем должность сотрудника и добавляем в position_employees, если ещё не там
-            try:
-                employee = employee_manager.get_employee(employee_id)
-                position = employee.get('position')
-
-                if position:
-                    if position not in position_employees:
-                        position_employees[position] = []
-                    if employee_id not in position_employees[position]:
-                        position_employees[position].append(employee_id)
-            except Exception as e:
-                print(f"Ошибка при получении информации о сотруднике {employee_id}: {str(e)}")
-        except Exception as e:
-            print(f"Ошибка при обработке задачи {task_id}: {str(e)}")
 
-    # Выводим текущую нагрузку и обнаруженные дубликаты
-    print("Текущее распределение нагрузки:")
-    for position, employees in position_employees.items():
-        print(f"Должность: {position}")
-        for emp_id in employees:
-            try:
-                employee = employee_manager.get_employee(emp_id)
-                print(f"  - {employee['name']}: {employee_workload.get(emp_id, 0)} дней")
-            except Exception as e:
-                print(f"  - Сотрудник ID {emp_id}: {employee_workload.get(emp_id, 0)} дней - Ошибка: {str(e)}")
-
-    # Проверяем дубликаты назначений с учетом должностей
-    print("Проверка дублирования назначений подзадач:")
-    duplicate_assignments = []
-    for subtask_key, assigned_employees in similar_subtask_assignments.items():
-        if len(set(assigned_employees)) < len(assigned_employees):
-            parent_id, task_name, position, timeframe = subtask_key
-            print(
-                f"  Найдено дублирование назначений для подзадачи '{task_name}' с должностью '{position}' в группе {parent_id}, период {timeframe}")
-            print(f"  Назначенные сотрудники: {assigned_employees}")
-            duplicate_assignments.append(subtask_key)
-
-    # Шаг 4: Сначала исправляем дублирующиеся назначения
-    if duplicate_assignments:
-        print(f"Исправление {len(duplicate_assignments)} случаев дублирования назначений...")
-        for subtask_key in duplicate_assignments:
-            parent_id, task_name, position, timeframe = subtask_key
-            assigned_employees = similar_subtask_assignments[subtask_key]
-
-            # Находим дубликаты (сотрудники, назначенные более одного раза)
-            from collections import Counter
-            employee_counts = Counter(assigned_employees)
-            duplicate_employees = [emp_id for emp_id, count in employee_counts.items() if count > 1]
-
-            print(f"Коррекция назначений для подзадачи '{task_name}' с должностью '{position}' в группе {parent_id}")
-            print(f"  Сотрудники с дублированием: {duplicate_employees}")
-
-            # Получаем подзадачи этой группы с этим именем, должностью и временным периодом
-            matching_subtasks = []
-            for task_id, dates in task_dates.items():
-                if task_id not in task_map:
-                    continue
+def _find_cycles(graph, nodes):
+    """
+    Находит циклы среди указанных задач (компоненты сильной связности, алгоритм Тарьяна)
 
-                task = task_map[task_id]
-                task_position = task.get('position', '')  # Добавляем проверку должности
+    Обход итеративный, поэтому длина цепочек зависимостей не ограничена
+    лимитом рекурсии.
 
-                if (task.get('parent_id') == parent_id or str(task.get('parent_id')) == parent_id) and \
-                        task.get('name') == task_name and \
-                        task_position == position and \
-                        dates.get('start') and dates.get('end') and \
-                        f"{dates.get('start')}-{dates.get('end')}" == timeframe:
-                    matching_subtasks.append((task_id, task, dates))
+    Args:
+        graph (dict): Граф зависимостей (задача -> список предшественников)
+        nodes (list): Задачи, среди которых ищутся циклы
 
-            print(f"  Найдено {len(matching_subtasks)} подзадач с подходящими параметрами")
+    Returns:
+        list: Циклы - списки ID задач в порядке графа
+    """
+    nodes = set(nodes)
+    graph_order = {node: position for position, node in enumerate(graph)}
+    index = {}
+    lowlink = {}
+    stack = []
+    on_stack = set()
+    cycles = []
+
+    for root in graph:
+        if root not in nodes or root in index:
+            continue
 
-            # Для каждого дублирующего сотрудника, оставляем только одно назначение
-            for emp_id in duplicate_employees:
-                # Подсчитываем, сколько раз этот сотрудник назначен
-                assignments_count = employee_counts[emp_id]
-                if assignments_count <= 1:
-                    continue
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(graph[root]))]
 
-                # Находим все подзадачи, назначенные на этого сотрудника
-                emp_assigned_subtasks = [
-                    (task_id, task, dates) for task_id, task, dates in matching_subtasks
-                    if dates.get('employee_id') == emp_id
-                ]
-
-                print(f"  Сотрудник {emp_id} назначен на {len(emp_assigned_subtasks)} подзадач")
-
-                # Оставляем только первое назначение, для остальных ищем других сотрудников
-                for idx, (task_id, task, dates) in enumerate(emp_assigned_subtasks[1:], 1):
-                    task_position = task.get('position')
-                    if not task_position:
-                        continue
-
-                    print(f"  Переназначение подзадачи {task_id} с сотрудника {emp_id}")
-
-                    # Ищем альтернативного сотрудника с той же должностью
-                    try:
-                        available_employees = employee_manager.get_employees_by_position(task_position)
-                        if not available_employees:
-                            continue
-
-                        # Исключаем сотрудников, которые уже назначены на подзадачи этого типа
-                        already_assigned = similar_subtask_assignments[subtask_key]
-                        alternative_employees = [e for e in available_employees if
-                                                 e['id'] not in already_assigned or e['id'] == emp_id]
-
-                        if not alternative_employees:
-                            # Если нет альтернатив, выбираем наименее загруженного из всех
-                            sorted_by_workload = sorted(available_employees,
-                                                        key=lambda e: employee_workload.get(e['id'], 0))
-                            new_employee = sorted_by_workload[0] if sorted_by_workload else None
-                        else:
-                            # Выбираем наименее загруженного из альтернативных
-                            sorted_by_workload = sorted(alternative_employees,
-                                                        key=lambda e: employee_workload.get(e['id'], 0))
-                            new_employee = sorted_by_workload[0] if sorted_by_workload else None
-
-                        if new_employee:
-                            new_emp_id = new_employee['id']
-
-                            # Проверяем доступность нового сотрудника
-                            from utils.employee_availability import get_available_dates_for_task
-                            task_duration = task.get('duration', 1)
-                            avail_start, avail_end, _ = get_available_dates_for_task(
-                                new_emp_id, dates.get('start'), task_duration, employee_manager
-                            )
-
-                            if avail_start and avail_end:
-                                # Обновляем назначение
-                                old_emp_name = None
-                                new_emp_name = None
-                                try:
-                                    old_emp = employee_manager.get_employee(emp_id)
-                                    old_emp_name = old_emp['name']
-                                except:
-                                    old_emp_name = f"ID: {emp_id}"
-
-                                try:
-                                    new_emp = new_employee
-                                    new_emp_name = new_emp['name']
-                                except:
-                                    new_emp_name = f"ID: {new_emp_id}"
-
-                                print(f"  Переназначаем подзадачу {task_id} с {old_emp_name} на {new_emp_name}")
-
-                                # Обновляем workload
-                                employee_workload[emp_id] -= task_duration
-                                employee_workload[new_emp_id] = employee_workload.get(new_emp_id, 0) + task_duration
-
-                                # Обновляем task_dates
-                                task_dates[task_id] = {
-                                    'start': avail_start,
-                                    'end': avail_end,
-                                    'employee_id': new_emp_id
-                                }
-
-                                # Обновляем список назначений
-                                similar_subtask_assignments[subtask_key].remove(emp_id)
-                                similar_subtask_assignments[subtask_key].append(new_emp_id)
-
-                                # Обновляем employee_tasks
-                                employee_tasks[emp_id] = [t for t in employee_tasks[emp_id] if t[0] != task_id]
-                                if new_emp_id not in employee_tasks:
-                                    employee_tasks[new_emp_id] = []
-                                employee_tasks[new_emp_id].append((task_id, task, task_duration))
-
-                                print(f"  Успешно переназначена подзадача {task_id}")
-                            else:
-                                print(
-                                    f"  Не удалось переназначить: сотрудник {new_emp_id} недоступен в период {dates.get('start')} - {dates.get('end')}")
-                        else:
-                            print(f"  Не найден подходящий сотрудник для переназначения")
-                    except Exception as e:
-                        print(f"  Ошибка при переназначении подзадачи {task_id}: {str(e)}")
-                        import traceback
-                        print(traceback.format_exc())
-
-    # Шаг 5: Выявляем дисбаланс в нагрузке - сниженный порог до 1 дня
-    position_imbalances = []  # список кортежей (position, imbalance)
-
-    for position, employees in position_employees.items():
-        if len(employees) <= 1:
-            continue  # Нет смысла балансировать, если только один сотрудник
-
-        # Находим минимальную и максимальную нагрузку
-        workloads = [employee_workload.get(emp_id, 0) for emp_id in employees]
-        min_load = min(workloads)
-        max_load = max(workloads)
-
-        # Вычисляем дисбаланс
-        imbalance = max_load - min_load
-
-        # Используем порог в 1 день для более агрессивной балансировки
-        if imbalance >= 1:
-            position_imbalances.append((position, imbalance))
-            print(f"Выявлен дисбаланс для должности {position}: {imbalance} дней")
-
-    # Сортируем позиции по степени дисбаланса - вначале обрабатываем наибольшие дисбалансы
-    position_imbalances.sort(key=lambda x: x[1], reverse=True)
-
-    # Шаг 6: Перераспределяем задачи для балансировки нагрузки с учетом дублирования
-    balancing_changes = {}  # task_id -> new_employee_id
-
-    for position, imbalance in position_imbalances:
-        employees = position_employees[position]
-
-        # Получаем сотрудников с максимальной и минимальной нагрузкой
-        sorted_employees = sorted(employees, key=lambda emp_id: employee_workload.get(emp_id, 0))
-
-        # Работаем со всеми парами сотрудников, начиная с наибольшего дисбаланса
-        for i in range(len(sorted_employees) - 1):
-            least_loaded_emp = sorted_employees[i]
-            least_loaded = employee_workload.get(least_loaded_emp, 0)
-
-            # Перебираем более загруженных сотрудников
-            for j in range(len(sorted_employees) - 1, i, -1):
-                most_loaded_emp = sorted_employees[j]
-                most_loaded = employee_workload.get(most_loaded_emp, 0)
-
-                current_imbalance = most_loaded - least_loaded
-                # Уменьшаем порог до 1 дня
-                if current_imbalance < 1:
-                    continue  # Минимальный дисбаланс допустим
-
-                print(
-                    f"Перераспределение задач от {most_loaded_emp} (нагрузка: {most_loaded}) к {least_loaded_emp} (нагрузка: {least_loaded})")
-
-                # Получаем все задачи загруженного сотрудника
-                tasks_to_reassign = employee_tasks.get(most_loaded_emp, [])
-
-                # Сортируем задачи от большей к меньшей длительности
-                tasks_to_reassign.sort(key=lambda x: x[2], reverse=True)
-
-                # Находим задачи, подходящие для перераспределения
-                tasks_for_balance = []
-                for task_info in tasks_to_reassign:
-                    task_id, task, duration = task_info
-
-                    # Проверяем, что эта должность подходит для задачи
-                    if task.get('position') and task.get('position') != position:
-                        continue  # Пропускаем задачи, требующие другую должность
-
-                    # Проверяем, не приведет ли переназначение к дублированию
-                    # для идентичных подзадач в одной группе с учетом должности
-                    if task.get('parent_id'):
-                        parent_id = task.get('parent_id')
-                        task_name = task.get('name', '')
-                        task_position = task.get('position', '')  # Учитываем должность
-
-                        # Получаем даты задачи
-                        if task_id in task_dates:
-                            dates = task_dates[task_id]
-                            timeframe = f"{dates.get('start')}-{dates.get('end')}"
-
-                            # Ключ с учетом должности
-                            subtask_key = (str(parent_id), task_name, task_position, timeframe)
-
-                            # Если сотрудник уже назначен на подзадачу такого типа, пропускаем
-                            if subtask_key in similar_subtask_assignments and \
-                                    least_loaded_emp in similar_subtask_assignments[subtask_key]:
-                                print(
-                                    f"  Пропускаем подзадачу {task_id}: наименее загруженный сотрудник {least_loaded_emp} уже назначен на аналогичную подзадачу")
-                                continue
-
-                    # Добавляем в список потенциальных задач все подходящие по должности
-                    tasks_for_balance.append(task_info)
-
-                # Если нет подходящих задач, пропускаем эту пару сотрудников
-                if not tasks_for_balance:
-                    print(f"  У сотрудника {most_loaded_emp} нет подходящих задач для перераспределения")
+        while work:
+            node, predecessors = work[-1]
+            for pred in predecessors:
+                if pred not in nodes:
                     continue
-
-                # Перераспределяем задачи пока не достигнем баланса
-                reassigned_count = 0
-                for task_id, task, duration in tasks_for_balance:
-                    # Проверяем текущий дисбаланс
-                    current_imbalance = employee_workload.get(most_loaded_emp, 0) - employee_workload.get(
-                        least_loaded_emp, 0)
-
-                    # Если дисбаланс меньше длительности задачи, это может сделать ситуацию хуже
-                    if current_imbalance < duration:
-                        # Только если это последняя попытка и перераспределений еще не было,
-                        # можно перебросить маленькую задачу
-                        if reassigned_count == 0 and len(tasks_for_balance) == 1:
-                            pass  # Продолжаем и перераспределяем единственную задачу
-                        else:
-                            continue  # Иначе пропускаем задачу
-
-                    # Проверяем доступность менее загруженного сотрудника
-                    task_start = None
-                    if task_id in task_dates and 'start' in task_dates[task_id]:
-                        task_start = task_dates[task_id]['start']
-                    elif task.get('start_date'):
-                        task_start = task.get('start_date')
-                    else:
-                        continue  # Нет даты начала, пропускаем
-
-                    try:
-                        # Получаем имена сотрудников для логирования
-                        most_loaded_name = "Неизвестный"
-                        least_loaded_name = "Неизвестный"
-                        try:
-                            most_loaded_emp_obj = employee_manager.get_employee(most_loaded_emp)
-                            most_loaded_name = most_loaded_emp_obj.get('name', str(most_loaded_emp))
-                        except:
-                            pass
-                        try:
-                            least_loaded_emp_obj = employee_manager.get_employee(least_loaded_emp)
-                            least_loaded_name = least_loaded_emp_obj.get('name', str(least_loaded_emp))
-                        except:
-                            pass
-
-                        # Проверяем доступность наименее загруженного сотрудника для задачи
-                        from utils.employee_availability import get_available_dates_for_task
-                        emp_start, emp_end, _ = get_available_dates_for_task(
-                            least_loaded_emp, task_start, duration, employee_manager
-                        )
-
-                        if not emp_start or not emp_end:
-                            print(
-                                f"  Сотрудник {least_loaded_name} недоступен для задачи {task_id} ({task.get('name', 'Без имени')}) в даты {task_start}")
-                            continue
-
-                        # Проверяем, не создаст ли переназначение конфликт для подзадач с учетом должности
-                        if task.get('parent_id'):
-                            parent_id = task.get('parent_id')
-                            task_name = task.get('name', '')
-                            task_position = task.get('position', '')  # Учитываем должность
-
-                            # Получаем новый timeframe
-                            timeframe = f"{emp_start}-{emp_end}"
-                            subtask_key = (str(parent_id), task_name, task_position, timeframe)
-
-                            # Проверяем, не назначен ли сотрудник уже на аналогичную подзадачу
-                            if subtask_key in similar_subtask_assignments and \
-                                    least_loaded_emp in similar_subtask_assignments[subtask_key]:
-                                print(
-                                    f"  Пропускаем: переназначение создаст конфликт для сотрудника {least_loaded_name}")
-                                continue
-
-                            # Обновляем отслеживание подзадач
-                            old_dates = task_dates[task_id]
-                            old_timeframe = f"{old_dates.get('start')}-{old_dates.get('end')}"
-                            old_key = (str(parent_id), task_name, task_position, old_timeframe)
-
-                            if old_key in similar_subtask_assignments:
-                                if most_loaded_emp in similar_subtask_assignments[old_key]:
-                                    similar_subtask_assignments[old_key].remove(most_loaded_emp)
-
-                            if subtask_key not in similar_subtask_assignments:
-                                similar_subtask_assignments[subtask_key] = []
-                            similar_subtask_assignments[subtask_key].append(least_loaded_emp)
-
-                        # Перераспределяем задачу
-                        print(
-                            f"  Перераспределяем задачу {task_id} ({task.get('name', 'Без имени')}) от {most_loaded_name} к {least_loaded_name}")
-
-                        # Сохраняем информацию о перераспределении
-                        task_dates[task_id]['employee_id'] = least_loaded_emp
-                        task_dates[task_id]['start'] = emp_start
-                        task_dates[task_id]['end'] = emp_end
-
-                        # Обновляем нагрузку
-                        employee_workload[most_loaded_emp] -= duration
-                        employee_workload[least_loaded_emp] += duration
-
-                        # Обновляем списки задач
-                        employee_tasks[most_loaded_emp].remove((task_id, task, duration))
-                        employee_tasks[least_loaded_emp].append((task_id, task, duration))
-
-                        balancing_changes[task_id] = least_loaded_emp
-                        reassigned_count += 1
-
-                        # Если достигли баланса, переходим к следующей паре
-                        if employee_workload[most_loaded_emp] - employee_workload[least_loaded_emp] < 1:
+                if pred not in index:
+                    index[pred] = lowlink[pred] = len(index)
+                    stack.append(pred)
+                    on_stack.add(pred)
+                    work.append((pred, iter(graph.get(pred, ()))))
+                    break
+                if pred in on_stack:
+                    lowlink[node] = min(lowlink[node], index[pred])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
                             break
+                    if len(component) > 1 or node in graph.get(node, ()):
+                        cycles.append(sorted(component, key=graph_order.get))
 
-                    except Exception as e:
-                        print(f"  Ошибка при перераспределении задачи {task_id}: {str(e)}")
-                        import traceback
-                        print(traceback.format_exc())
-
-                # Выводим результат для пары сотрудников
-                if reassigned_count > 0:
-                    print(f"  Перераспределено {reassigned_count} задач между сотрудниками")
-                    try:
-                        most_loaded_name = employee_manager.get_employee(most_loaded_emp)['name']
-                    except:
-                        most_loaded_name = f"Сотрудник {most_loaded_emp}"
-                    try:
-                        least_loaded_name = employee_manager.get_employee(least_loaded_emp)['name']
-                    except:
-                        least_loaded_name = f"Сотрудник {least_loaded_emp}"
-                    print(f"  Новая нагрузка {most_loaded_name}: {employee_workload[most_loaded_emp]} дней")
-                    print(f"  Новая нагрузка {least_loaded_name}: {employee_workload[least_loaded_emp]} дней")
-
-    # Выводим итоговые результаты балансировки
-    print("\nИтоговые результаты балансировки нагрузки:")
-    for position, employees in position_employees.items():
-        print(f"Должность: {position}")
-        # Сортируем сотрудников по нагрузке для лучшей читаемости
-        sorted_emp = sorted(employees, key=lambda emp_id: employee_workload.get(emp_id, 0), reverse=True)
-        for emp_id in sorted_emp:
-            try:
-                employee = employee_manager.get_employee(emp_id)
-                print(f"  - {employee['name']}: {employee_workload.get(emp_id, 0)} дней")
-            except:
-                print(f"  - Сотрудник ID {emp_id}: {employee_workload.get(emp_id, 0)} дней")
-
-    print(f"Всего изменено назначений: {len(balancing_changes)}")
-
-    # Проверяем наличие дублирующихся назначений после балансировки
-    duplicate_count = 0
-    for subtask_key, assigned_employees in similar_subtask_assignments.items():
-        if len(set(assigned_employees)) < len(assigned_employees):
-            parent_id, task_name, position, timeframe = subtask_key
-            print(f"ВНИМАНИЕ: Остались дублирующиеся назначения для подзадачи '{task_name}' с должностью '{position}' в группе {parent_id}")
-            print(f"  Назначенные сотрудники: {assigned_employees}")
-            duplicate_count += 1
-
-    if duplicate_count == 0:
-        print("Проверка успешна: дублирующихся назначений не найдено!")
-    else:
-        print(f"ВНИМАНИЕ: Найдено {duplicate_count} случаев дублирования назначений!")
+    return cycles
 
-    # Возвращаем обновленный task_dates
-    return task_dates
 
-def build_dependency_graph(tasks, task_manager):
+def build_successors(graph):
     """
-    Строит граф зависимостей между задачами
+    Строит обратный граф: задача -> список зависимых от нее задач
 
     Args:
-        tasks (list): Список задач
-        task_manager: Менеджер задач
+        graph (dict): Граф зависимостей (задача -> список предшественников)
 
     Returns:
-        tuple: (graph, task_map) - граф зависимостей и словарь задач по ID
+        dict: ID задачи -> список ID зависимых задач в порядке графа
     """
-    import json
-
-    # Инициализируем граф и словарь задач
-    graph = {}  # task_id -> список ID предшественников
-    task_map = {}  # task_id -> task
+    successors = {}
+    for task_id, predecessors in graph.items():
+        for pred_id in predecessors:
+            successors.setdefault(pred_id, []).append(task_id)
+    return successors
 
-    # Создаем словарь задач по ID для быстрого доступа
-    for task in tasks:
-        task_id = task['id']
-        task_id_str = str(task_id)
-        graph[task_id_str] = []
-        task_map[task_id_str] = task
-        # Также добавим отображение числового ID на строковый
-        if task_id != task_id_str:
-            task_map[task_id] = task
 
-    # Создаем словарь задач по имени для поиска предшественников, указанных по имени
-    tasks_by_name = {}
-    for task in tasks:
-        task_name = task.get('name')
-        if task_name:
-            tasks_by_name[task_name] = str(task['id'])
+def calculate_project_duration(project_start_date, task_dates):
+    """
+    Рассчитывает общую длительность проекта в днях
+    """
+    if not task_dates:
+        return 0
 
-    # Заполняем граф зависимостями
-    for task in tasks:
-        task_id = str(task['id'])
-        task_name = task.get('name', f"Задача {task_id}")
+    # Некорректные даты задач отбрасывает _extreme_iso_date, поэтому ошибку
+    # может дать только дата начала проекта
+    try:
+        project_start = _parse_date(project_start_date)
+    except (ValueError, TypeError) as e:
+        logger.error("Ошибка при расчете длительности проекта: %s", e)
+        return 0
 
-        # Получаем зависимости из поля predecessors
-        predecessors = []
-        if 'predecessors' in task and task['predecessors']:
-            # Обрабатываем разные форматы предшественников
-            if isinstance(task['predecessors'], list):
-                for pred in task['predecessors']:
-                    if isinstance(pred, (int, str)):
-                        predecessors.append(str(pred))
-            elif isinstance(task['predecessors'], str):
-                try:
-                    # Пробуем распарсить как JSON
-                    pred_list = json.loads(task['predecessors'])
-                    if isinstance(pred_list, list):
-                        for pred in pred_list:
-                            if isinstance(pred, (int, str)):
-                                predecessors.append(str(pred))
-                except json.JSONDecodeError:
-                    # Если не JSON, пробуем разделить по запятым
-                    if ',' in task['predecessors']:
-                        for pred in task['predecessors'].split(','):
-                            pred = pred.strip()
-                            if pred.isdigit():
-                                predecessors.append(pred)
-                            elif pred in tasks_by_name:
-                                predecessors.append(tasks_by_name[pred])
-
-        # Получаем зависимости из базы данных
-        try:
-            db_deps = task_manager.get_task_dependencies(task['id'])
-            for dep in db_deps:
-                predecessor_id = str(dep['predecessor_id'])
-                if predecessor_id not in predecessors:
-                    predecessors.append(predecessor_id)
-        except Exception as e:
-            print(f"Ошибка при получении зависимостей из БД для задачи {task_id}: {e}")
+    # Находим самую позднюю дату окончания
+    latest_end_date = _extreme_iso_date(
+        (dates.get('end') for dates in task_dates.values()), latest=True
+    )
 
-        # Добавляем зависимости в граф
-        for pred_id in predecessors:
-            pred_id_str = str(pred_id)
-            if pred_id_str not in graph:
-                graph[pred_id_str] = []
-                # Пытаемся найти задачу с таким ID
-                pred_task = None
-                for t in tasks:
-                    if str(t['id']) == pred_id_str:
-                        pred_task = t
-                        break
-                if pred_task:
-                    task_map[pred_id_str] = pred_task
+    if latest_end_date is None:
+        return 0
 
-            graph[task_id].append(pred_id_str)
+    # Рассчитываем длительность в днях
+    duration = (latest_end_date - project_start).days + 1
+    return duration
 
-    return graph, task_map
 
-def topological_sort(graph):
-    """
-    Выполняет топологическую сортировку задач
+def _extreme_iso_date(values, latest):
     """
-    # Получаем все узлы графа
-    all_nodes = set(graph.keys())
+    Находит самую раннюю или самую позднюю корректную дату среди строк YYYY-MM-DD
 
-    # Обратный граф (предшественник -> список зависимых задач)
-    reverse_graph = {}
-    for node, predecessors in graph.items():
-        for pred in predecessors:
-            if pred not in reverse_graph:
-                reverse_graph[pred] = []
-            reverse_graph[pred].append(node)
+    Даты сравниваются после разбора (кэшированного _parse_date): строки без ведущих
+    нулей нельзя сравнивать как строки. Некорректные строки отбрасываются,
+    значения другого типа и пустые значения пропускаются.
 
-            # Добавляем предшественников, даже если они не в исходном списке задач
-            if pred not in all_nodes:
-                all_nodes.add(pred)
-                graph[pred] = []
+    Args:
+        values: Итерируемые значения дат
+        latest (bool): True - искать самую позднюю дату, False - самую раннюю
 
-    # Подсчитываем число предшественников для каждой задачи
-    in_degree = {node: len(graph[node]) for node in all_nodes}
+    Returns:
+        datetime.date: Крайняя дата или None, если корректных дат нет
+    """
+    dates = []
+    for value in values:
+        if value and isinstance(value, str):
+            try:
+                dates.append(_parse_date(value))
+            except ValueError:
+                continue
 
-    # Создаем список задач без предшественников
-    queue = [node for node in all_nodes if in_degree[node] == 0]
-    result = []
+    pick = max if latest else min
+    return pick(dates, default=None)
 
-    # Выполняем топологическую сортировку
-    while queue:
-        current = queue.pop(0)
-        result.append(current)
-
-        # Обновляем зависимости для задач, зависящих от текущей
-        if current in reverse_graph:
-            for dependent in reverse_graph[current]:
-                in_degree[dependent] -= 1
-                if in_degree[dependent] == 0:
-                    queue.append(dependent)
-
-    # Проверяем, все ли задачи обработаны
-    if len(result) != len(all_nodes):
-        print("ПРЕДУПРЕЖДЕНИЕ: В графе обнаружены циклы!")
-        # Добавляем непосещенные узлы в конец
-        for node in all_nodes:
-            if node not in result:
-                result.append(node)
 
-    return result
+def _end_ordinals(task_dates):
+    """
+    Разбирает даты окончания задач один раз в порядковые номера дней
 
+    Args:
+        task_dates (dict): Словарь с датами задач
 
-def calculate_project_duration(project_start_date, task_dates):
+    Returns:
+        dict: Словарь {ID задачи: порядковый номер даты окончания}
     """
-    Рассчитывает общую длительность проекта в днях
+    parsed, _ = _parse_task_dates(task_dates)
+    return {task_id: end for task_id, (_, end) in parsed.items() if end is not None}
+
+
+def _parse_task_dates(task_dates):
     """
-    if not task_dates:
-        return 0
+    Один раз разбирает даты начала и окончания всех задач в порядковые номера дней
 
-    try:
-        project_start = datetime.datetime.strptime(project_start_date, '%Y-%m-%d')
+    Args:
+        task_dates (dict): Словарь с датами задач
 
-        # Находим самую позднюю дату окончания
-        latest_end_date = None
+    Returns:
+        tuple: (parsed, errors) - parsed: ID задачи -> (start, end), где отсутствующая
+               или некорректная дата равна None; errors: ID задачи -> текст первой
+               ошибки разбора
+    """
+    parsed = {}
+    errors = {}
 
-        for task_id, dates in task_dates.items():
-            if 'end' in dates:
+    for task_id, dates in task_dates.items():
+        ordinals = []
+        for key in ('start', 'end'):
+            value = dates.get(key)
+            ordinal = None
+            if value:
                 try:
-                    end_date = datetime.datetime.strptime(dates['end'], '%Y-%m-%d')
-                    if latest_end_date is None or end_date > latest_end_date:
-                        latest_end_date = end_date
-                except (ValueError, TypeError):
-                    continue
+                    ordinal = _date_to_ordinal(value)
+                except (ValueError, TypeError) as e:
+                    errors.setdefault(task_id, str(e))
+            ordinals.append(ordinal)
+        parsed[task_id] = tuple(ordinals)
 
-        if latest_end_date is None:
-            return 0
+    return parsed, errors
 
-        # Рассчитываем длительность в днях
-        duration = (latest_end_date - project_start).days + 1
-        return duration
 
-    except Exception as e:
-        print(f"Ошибка при расчете длительности проекта: {str(e)}")
-        return 0
+def _trace_critical_path(finish, graph):
+    """
+    Восстанавливает критический путь по готовым временам окончания задач
+
+    Путь идёт от задачи с самым поздним окончанием к началу проекта через
+    предшественника с максимальным временем окончания. Учитываются только
+    предшественники, присутствующие в finish и еще не вошедшие в путь, поэтому
+    каждая задача посещается не более одного раза даже при циклах в графе.
+
+    Args:
+        finish (dict): Порядковые номера дат окончания задач
+        graph (dict): Граф зависимостей
+
+    Returns:
+        list: Список ID задач критического пути (от начала к концу)
+    """
+    if not finish:
+        return []
+
+    # Единственная задача с датами и есть путь
+    if len(finish) == 1:
+        return list(finish)
+
+    critical_path = []
+    on_path = set()
+    current_task_id = max(finish, key=finish.get)
+
+    while current_task_id is not None:
+        critical_path.append(current_task_id)
+        on_path.add(current_task_id)
+        current_task_id = max(
+            (pred_id for pred_id in graph.get(current_task_id, [])
+             if pred_id in finish and pred_id not in on_path),
+            key=finish.get,
+            default=None
+        )
+
+    return list(reversed(critical_path))
 
 
 def identify_critical_path_without_subtasks(task_dates, graph, task_map):
@@ -2798,69 +2112,13 @@ def identify_critical_path_without_subtasks(task_dates, graph, task_map):
             # Если не можем определить, оставляем задачу
             main_task_dates[task_id] = dates
 
-    print(f"[Debug] Критический путь: исходных задач {len(task_dates)}, основных задач {len(main_task_dates)}")
-
-    # Ищем самую позднюю дату окончания среди основных задач
-    latest_end_date = None
-    latest_task_id = None
-
-    for task_id, dates in main_task_dates.items():
-        if 'end' in dates:
-            try:
-                import datetime
-                end_date = datetime.datetime.strptime(dates['end'], '%Y-%m-%d')
-                if latest_end_date is None or end_date > latest_end_date:
-                    latest_end_date = end_date
-                    latest_task_id = task_id
-            except (ValueError, TypeError):
-                continue
-
-    # Если не нашли последнюю задачу, возвращаем пустой список
-    if latest_task_id is None:
-        return []
-
-    # Строим критический путь только через основные задачи
-    critical_path = []
-    current_task_id = latest_task_id
-
-    while current_task_id is not None:
-        critical_path.append(current_task_id)
-
-        # Находим предшественников текущей задачи среди основных задач
-        predecessors = graph.get(current_task_id, [])
+    logger.debug(
+        "[Debug] Критический путь: исходных задач %s, основных задач %s", len(task_dates), len(main_task_dates))
 
-        # Фильтруем предшественников, оставляя только основные задачи
-        main_predecessors = []
-        for pred_id in predecessors:
-            if pred_id in main_task_dates:
-                main_predecessors.append(pred_id)
-
-        if not main_predecessors:
-            # Это начальная задача, путь построен
-            break
-
-        # Ищем предшественника с самой поздней датой окончания среди основных задач
-        latest_predecessor_id = None
-        latest_predecessor_end = None
-
-        for pred_id in main_predecessors:
-            if pred_id in main_task_dates and 'end' in main_task_dates[pred_id]:
-                try:
-                    import datetime
-                    end_date = datetime.datetime.strptime(main_task_dates[pred_id]['end'], '%Y-%m-%d')
-                    if latest_predecessor_end is None or end_date > latest_predecessor_end:
-                        latest_predecessor_end = end_date
-                        latest_predecessor_id = pred_id
-                except (ValueError, TypeError):
-                    continue
-
-        # Переходим к предшественнику или завершаем, если предшественников нет
-        current_task_id = latest_predecessor_id
-
-    # Возвращаем критический путь в обратном порядке (от начала к концу)
-    filtered_path = list(reversed(critical_path))
+    # Времена окончания разбираются один раз, дальше сравниваются целые числа
+    filtered_path = _trace_critical_path(_end_ordinals(main_task_dates), graph)
 
-    print(f"[Debug] Критический путь (основные задачи): {len(filtered_path)} задач")
+    logger.debug("[Debug] Критический путь (основные задачи): %s задач", len(filtered_path))
 
     return filtered_path
 
@@ -2871,52 +2129,7 @@ def identify_critical_path(task_dates, graph, task_map):
     if not task_dates:
         return []
 
-    # Находим задачу с самой поздней датой окончания
-    latest_end_date = None
-    latest_task_id = None
-
-    for task_id, dates in task_dates.items():
-        if 'end' in dates:
-            try:
-                end_date = datetime.datetime.strptime(dates['end'], '%Y-%m-%d')
-                if latest_end_date is None or end_date > latest_end_date:
-                    latest_end_date = end_date
-                    latest_task_id = task_id
-            except (ValueError, TypeError):
-                continue
-
-    if latest_task_id is None:
-        return []
-
-    # Строим критический путь от конца к началу
-    critical_path = []
-    current_task_id = latest_task_id
-
-    while current_task_id is not None:
-        critical_path.append(current_task_id)
-
-        # Находим предшественника с самой поздней датой окончания
-        predecessors = graph.get(current_task_id, [])
-        if not predecessors:
-            break
-
-        latest_predecessor_id = None
-        latest_predecessor_end = None
-
-        for pred_id in predecessors:
-            if pred_id in task_dates and 'end' in task_dates[pred_id]:
-                try:
-                    end_date = datetime.datetime.strptime(task_dates[pred_id]['end'], '%Y-%m-%d')
-                    if latest_predecessor_end is None or end_date > latest_predecessor_end:
-                        latest_predecessor_end = end_date
-                        latest_predecessor_id = pred_id
-                except (ValueError, TypeError):
-                    continue
-
-        current_task_id = latest_predecessor_id
-
-    # Возвращаем критический путь в правильном порядке (от начала к концу)
-    return list(reversed(critical_path))
+    return _trace_critical_path(_end_ordinals(task_dates), graph)
 
 def update_database_assignments(task_dates, task_manager, employee_manager=None):
     """
@@ -2930,18 +2143,20 @@ def update_database_assignments(task_dates, task_manager, employee_manager=None)
     Returns:
         int: Количество обновленных задач
     """
-    print(f"Пакетное обновление базы данных для {len(task_dates)} задач...")
+    logger.debug("Пакетное обновление базы данных для %s задач...", len(task_dates))
 
-    # Подготавливаем пакеты для обновления
+    # Подготавливаем пакеты для обновления: даты и сотрудник задачи пишутся одним UPDATE,
+    # отдельный пакет нужен только для задач с сотрудником, но без дат
     date_updates = []
     employee_updates = []
+    assigned_count = 0
 
     for task_id, task_data in task_dates.items():
         try:
             # Преобразуем task_id в числовой формат
             numeric_task_id = int(task_id) if isinstance(task_id, str) and task_id.isdigit() else task_id
         except (ValueError, TypeError):
-            print(f"Ошибка конвертации ID задачи {task_id}")
+            logger.warning("Ошибка конвертации ID задачи %s", task_id)
             continue
 
         # Получаем данные для обновления
@@ -2950,67 +2165,79 @@ def update_database_assignments(task_dates, task_manager, employee_manager=None)
         employee_id = task_data.get('employee_id')
 
         # Добавляем в пакеты обновлений
-        if start_date and end_date:
-            date_updates.append((start_date, end_date, numeric_task_id))
-
         if employee_id is not None:
+            assigned_count += 1
+
+        if start_date and end_date:
+            date_updates.append((start_date, end_date, employee_id, numeric_task_id))
+        elif employee_id is not None:
             employee_updates.append((employee_id, numeric_task_id))
 
-    # Выполняем пакетное обновление дат
+    # Выполняем оба пакетных обновления в одной транзакции
     updated_dates = 0
-    if date_updates:
-        try:
-            task_manager.db.connect()
-            task_manager.db.cursor.executemany(
-                "UPDATE tasks SET start_date = ?, end_date = ? WHERE id = ?",
-                date_updates
-            )
-            task_manager.db.connection.commit()
-            task_manager.db.close()
-            updated_dates = len(date_updates)
-            print(f"Обновлены даты для {updated_dates} задач")
-        except Exception as e:
-            print(f"Ошибка при пакетном обновлении дат: {str(e)}")
-            task_manager.db.close()
-
-    # Выполняем пакетное обновление назначений сотрудников
     updated_employees = 0
-    if employee_updates:
+    if date_updates or employee_updates:
         try:
             task_manager.db.connect()
-            task_manager.db.cursor.executemany(
-                "UPDATE tasks SET employee_id = ? WHERE id = ?",
-                employee_updates
-            )
-            task_manager.db.connection.commit()
-            task_manager.db.close()
-            updated_employees = len(employee_updates)
-            print(f"Обновлены назначения для {updated_employees} задач")
+            with task_manager.db.connection:
+                if date_updates:
+                    task_manager.db.cursor.executemany(
+                        "UPDATE tasks SET start_date = ?, end_date = ?, employee_id = COALESCE(?, employee_id) "
+                        "WHERE id = ?",
+                        date_updates
+                    )
+                if employee_updates:
+                    task_manager.db.cursor.executemany(
+                        "UPDATE tasks SET employee_id = ? WHERE id = ?",
+                        employee_updates
+                    )
+            updated_dates = len(date_updates)
+            updated_employees = assigned_count
+            logger.debug("Обновлены даты для %s задач, назначения для %s задач", updated_dates, updated_employees)
         except Exception as e:
-            print(f"Ошибка при пакетном обновлении назначений: {str(e)}")
+            logger.error("Ошибка при пакетном обновлении базы данных: %s", e)
+        finally:
             task_manager.db.close()
 
     total_updated = updated_dates + updated_employees
-    print(f"Общее количество обновлений: {total_updated}")
+    logger.info("Общее количество обновлений: %s", total_updated)
 
     return total_updated
 
+def _load_employees_by_id(employee_manager):
+    """
+    Загружает всех сотрудников одним запросом
+
+    Returns:
+        dict: ID сотрудника -> данные сотрудника (пустой словарь в случае ошибки)
+    """
+    try:
+        return {employee['id']: employee for employee in employee_manager.get_all_employees()}
+    except Exception as e:
+        logger.error("Ошибка при получении списка сотрудников: %s", e)
+        return {}
+
+
 def print_workload_statistics(employee_workload, employee_manager):
     """
     Выводит статистику загрузки сотрудников
     """
-    print("\nСтатистика загрузки сотрудников:")
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
 
+    logger.debug("Статистика загрузки сотрудников:")
+
+    employees = _load_employees_by_id(employee_manager)
     for emp_id, workload in employee_workload.items():
-        try:
-            employee = employee_manager.get_employee(emp_id)
-            print(f"  {employee['name']} ({employee['position']}): {workload} дней")
-        except:
-            print(f"  Сотрудник ID {emp_id}: {workload} дней")
+        employee = employees.get(emp_id)
+        if employee is not None:
+            logger.debug("  %s (%s): %s дней", employee['name'], employee['position'], workload)
+        else:
+            logger.debug("  Сотрудник ID %s: %s дней", emp_id, workload)
 
     if employee_workload:
         avg_workload = sum(employee_workload.values()) / len(employee_workload)
-        print(f"Средняя нагрузка: {avg_workload:.1f} дней")
+        logger.debug("Средняя нагрузка: %.1f дней", avg_workload)
 
 
 def validate_project_schedule(task_dates, task_map, graph=None):
@@ -3028,7 +2255,10 @@ def validate_project_schedule(task_dates, task_map, graph=None):
     warnings = []
     critical_errors = []
 
-    print("Проверка корректности календарного плана...")
+    logger.debug("Проверка корректности календарного плана...")
+
+    # Даты всех задач разбираются один раз и используются во всех проверках
+    parsed, parse_errors = _parse_task_dates(task_dates)
 
     # 1. Проверяем основные данные
     for task_id, dates in task_dates.items():
@@ -3039,83 +2269,58 @@ def validate_project_schedule(task_dates, task_map, graph=None):
             critical_errors.append(f"Задача {task_id}: отсутствуют даты")
             continue
 
-        try:
-            start = datetime.datetime.strptime(start_date, '%Y-%m-%d')
-            end = datetime.datetime.strptime(end_date, '%Y-%m-%d')
-
-            if start > end:
-                critical_errors.append(
-                    f"Задача {task_id}: дата начала ({start_date}) позже даты окончания ({end_date})")
+        if task_id in parse_errors:
+            critical_errors.append(f"Задача {task_id}: некорректный формат дат - {parse_errors[task_id]}")
+            continue
 
-        except ValueError as e:
-            critical_errors.append(f"Задача {task_id}: некорректный формат дат - {str(e)}")
+        start, end = parsed[task_id]
+        if start > end:
+            critical_errors.append(
+                f"Задача {task_id}: дата начала ({start_date}) позже даты окончания ({end_date})")
 
     # 2. Проверяем согласованность родительских задач и подзадач
-    parent_to_subtasks = {}
-    for task_id, task in task_map.items():
-        parent_id = task.get('parent_id')
-        if parent_id:
-            parent_id_str = str(parent_id)
-            if parent_id_str not in parent_to_subtasks:
-                parent_to_subtasks[parent_id_str] = []
-            parent_to_subtasks[parent_id_str].append(str(task_id))
+    parent_to_subtasks = subtask_ids_by_parent(task_map)
 
     for parent_id, subtask_ids in parent_to_subtasks.items():
         if parent_id not in task_dates:
             warnings.append(f"Родительская задача {parent_id} не найдена в расписании")
             continue
 
-        parent_dates = task_dates[parent_id]
-        parent_start = parent_dates.get('start')
-        parent_end = parent_dates.get('end')
+        parent_start = task_dates[parent_id].get('start')
+        parent_end = task_dates[parent_id].get('end')
+        parent_start_date, parent_end_date = parsed[parent_id]
 
-        if not parent_start or not parent_end:
+        # Задачи без дат или с некорректными датами уже учтены в п. 1
+        if parent_start_date is None or parent_end_date is None:
             continue
 
-        try:
-            parent_start_date = datetime.datetime.strptime(parent_start, '%Y-%m-%d')
-            parent_end_date = datetime.datetime.strptime(parent_end, '%Y-%m-%d')
-
-            # Находим крайние даты подзадач
-            earliest_subtask = None
-            latest_subtask = None
-
-            for subtask_id in subtask_ids:
-                if subtask_id not in task_dates:
-                    warnings.append(f"Подзадача {subtask_id} не найдена в расписании")
-                    continue
-
-                subtask_dates = task_dates[subtask_id]
-                subtask_start = subtask_dates.get('start')
-                subtask_end = subtask_dates.get('end')
-
-                if not subtask_start or not subtask_end:
-                    continue
-
-                try:
-                    subtask_start_date = datetime.datetime.strptime(subtask_start, '%Y-%m-%d')
-                    subtask_end_date = datetime.datetime.strptime(subtask_end, '%Y-%m-%d')
+        # Находим крайние даты подзадач
+        earliest_subtask = None
+        latest_subtask = None
 
-                    if earliest_subtask is None or subtask_start_date < earliest_subtask:
-                        earliest_subtask = subtask_start_date
+        for subtask_id in subtask_ids:
+            if subtask_id not in task_dates:
+                warnings.append(f"Подзадача {subtask_id} не найдена в расписании")
+                continue
 
-                    if latest_subtask is None or subtask_end_date > latest_subtask:
-                        latest_subtask = subtask_end_date
+            subtask_start_date, subtask_end_date = parsed[subtask_id]
+            if subtask_start_date is None or subtask_end_date is None:
+                continue
 
-                except ValueError:
-                    continue
+            if earliest_subtask is None or subtask_start_date < earliest_subtask:
+                earliest_subtask = subtask_start_date
 
-            # Проверяем согласованность
-            if earliest_subtask and earliest_subtask < parent_start_date:
-                warnings.append(
-                    f"Подзадачи родительской задачи {parent_id} начинаются раньше ({earliest_subtask.strftime('%Y-%m-%d')}) чем родительская задача ({parent_start})")
+            if latest_subtask is None or subtask_end_date > latest_subtask:
+                latest_subtask = subtask_end_date
 
-            if latest_subtask and latest_subtask > parent_end_date:
-                warnings.append(
-                    f"Подзадачи родительской задачи {parent_id} заканчиваются позже ({latest_subtask.strftime('%Y-%m-%d')}) чем родительская задача ({parent_end})")
+        # Проверяем согласованность
+        if earliest_subtask is not None and earliest_subtask < parent_start_date:
+            warnings.append(
+                f"Подзадачи родительской задачи {parent_id} начинаются раньше ({_ordinal_to_str(earliest_subtask)}) чем родительская задача ({parent_start})")
 
-        except ValueError as e:
-            warnings.append(f"Ошибка при проверке дат родительской задачи {parent_id}: {str(e)}")
+        if latest_subtask is not None and latest_subtask > parent_end_date:
+            warnings.append(
+                f"Подзадачи родительской задачи {parent_id} заканчиваются позже ({_ordinal_to_str(latest_subtask)}) чем родительская задача ({parent_end})")
 
     # 3. Проверяем зависимости между задачами
     if graph:
@@ -3125,82 +2330,65 @@ def validate_project_schedule(task_dates, task_map, graph=None):
                 continue
 
             task_start = task_dates[task_id].get('start')
-            if not task_start:
+            task_start_date = parsed[task_id][0]
+            if task_start_date is None:
                 continue
 
-            try:
-                task_start_date = datetime.datetime.strptime(task_start, '%Y-%m-%d')
-
-                for pred_id in predecessors:
-                    if pred_id not in task_dates:
-                        warnings.append(f"Предшественник {pred_id} задачи {task_id} не найден в расписании")
-                        continue
-
-                    pred_end = task_dates[pred_id].get('end')
-                    if not pred_end:
-                        continue
-
-                    try:
-                        pred_end_date = datetime.datetime.strptime(pred_end, '%Y-%m-%d')
-
-                        if task_start_date <= pred_end_date:
-                            dependency_violations += 1
-                            task_name = task_map.get(task_id, {}).get('name', f'Задача {task_id}')
-                            pred_name = task_map.get(pred_id, {}).get('name', f'Задача {pred_id}')
-                            critical_errors.append(
-                                f"Нарушение зависимости: '{task_name}' начинается {task_start}, "
-                                f"но её предшественник '{pred_name}' заканчивается {pred_end}"
-                            )
+            for pred_id in predecessors:
+                if pred_id not in task_dates:
+                    warnings.append(f"Предшественник {pred_id} задачи {task_id} не найден в расписании")
+                    continue
 
-                    except ValueError:
-                        continue
+                pred_end = task_dates[pred_id].get('end')
+                pred_end_date = parsed[pred_id][1]
+                if pred_end_date is None:
+                    continue
 
-            except ValueError:
-                continue
+                if task_start_date <= pred_end_date:
+                    dependency_violations += 1
+                    task_name = task_map.get(task_id, {}).get('name', f'Задача {task_id}')
+                    pred_name = task_map.get(pred_id, {}).get('name', f'Задача {pred_id}')
+                    critical_errors.append(
+                        f"Нарушение зависимости: '{task_name}' начинается {task_start}, "
+                        f"но её предшественник '{pred_name}' заканчивается {pred_end}"
+                    )
 
         if dependency_violations > 0:
-            print(f"❌ Найдено {dependency_violations} нарушений зависимостей!")
+            logger.error("❌ Найдено %s нарушений зависимостей!", dependency_violations)
 
     # 4. Проверяем разумность длительности задач
     duration_warnings = 0
-    for task_id, dates in task_dates.items():
-        start_date = dates.get('start')
-        end_date = dates.get('end')
-
-        if start_date and end_date:
-            try:
-                start = datetime.datetime.strptime(start_date, '%Y-%m-%d')
-                end = datetime.datetime.strptime(end_date, '%Y-%m-%d')
-                duration = (end - start).days + 1
+    for task_id, (start, end) in parsed.items():
+        if start is None or end is None:
+            continue
 
-                # Проверяем слишком длинные задачи
-                if duration > 90:  # Более 3 месяцев
-                    task_name = task_map.get(task_id, {}).get('name', f'Задача {task_id}')
-                    warnings.append(f"Задача '{task_name}' имеет очень большую длительность: {duration} дней")
-                    duration_warnings += 1
+        duration = end - start + 1
 
-            except ValueError:
-                continue
+        # Проверяем слишком длинные задачи
+        if duration > 90:  # Более 3 месяцев
+            task_name = task_map.get(task_id, {}).get('name', f'Задача {task_id}')
+            warnings.append(f"Задача '{task_name}' имеет очень большую длительность: {duration} дней")
+            duration_warnings += 1
 
     # 5. Выводим сводку
     total_issues = len(critical_errors) + len(warnings)
 
     if critical_errors:
-        print(f"❌ Найдено {len(critical_errors)} критических ошибок:")
+        logger.error("❌ Найдено %s критических ошибок:", len(critical_errors))
         for error in critical_errors[:5]:  # Показываем первые 5
-            print(f"  • {error}")
+            logger.debug("  • %s", error)
         if len(critical_errors) > 5:
-            print(f"  ... и еще {len(critical_errors) - 5} ошибок")
+            logger.debug("  ... и еще %s ошибок", len(critical_errors) - 5)
 
     if warnings:
-        print(f"⚠️ Найдено {len(warnings)} предупреждений:")
+        logger.warning("⚠️ Найдено %s предупреждений:", len(warnings))
         for warning in warnings[:3]:  # Показываем первые 3
-            print(f"  • {warning}")
+            logger.debug("  • %s", warning)
         if len(warnings) > 3:
-            print(f"  ... и еще {len(warnings) - 3} предупреждений")
+            logger.debug("  ... и еще %s предупреждений", len(warnings) - 3)
 
     if not critical_errors and not warnings:
-        print("✅ Календарный план прошел проверку - критических проблем не найдено!")
+        logger.debug("✅ Календарный план прошел проверку - критических проблем не найдено!")
 
     is_valid = len(critical_errors) == 0
     all_issues = critical_errors + warnings
@@ -3472,84 +2660,66 @@ def simple_final_validation(task_dates, task_map):
     """
     warnings = []
 
-    print("Финальная проверка корректности дат...")
+    logger.debug("Финальная проверка корректности дат...")
+
+    # Даты всех задач разбираются один раз
+    parsed, parse_errors = _parse_task_dates(task_dates)
 
     # Проверяем согласованность дат родителей и подзадач
-    parent_to_subtasks = {}
-    for task_id, task in task_map.items():
-        parent_id = task.get('parent_id')
-        if parent_id:
-            parent_id_str = str(parent_id)
-            if parent_id_str not in parent_to_subtasks:
-                parent_to_subtasks[parent_id_str] = []
-            parent_to_subtasks[parent_id_str].append(str(task_id))
+    parent_to_subtasks = subtask_ids_by_parent(task_map)
 
     for parent_id, subtask_ids in parent_to_subtasks.items():
         if parent_id not in task_dates:
             continue
 
-        parent_start = task_dates[parent_id].get('start')
-        parent_end = task_dates[parent_id].get('end')
+        parent_start_date, parent_end_date = parsed[parent_id]
 
-        if not parent_start or not parent_end:
+        # Некорректные даты родителя попадут в проверку формата ниже
+        if parent_start_date is None or parent_end_date is None:
             continue
 
-        try:
-            parent_start_date = datetime.datetime.strptime(parent_start, '%Y-%m-%d')
-            parent_end_date = datetime.datetime.strptime(parent_end, '%Y-%m-%d')
-
-            for subtask_id in subtask_ids:
-                if subtask_id not in task_dates:
-                    continue
-
-                subtask_start = task_dates[subtask_id].get('start')
-                subtask_end = task_dates[subtask_id].get('end')
-
-                if not subtask_start or not subtask_end:
-                    continue
-
-                subtask_start_date = datetime.datetime.strptime(subtask_start, '%Y-%m-%d')
-                subtask_end_date = datetime.datetime.strptime(subtask_end, '%Y-%m-%d')
+        for subtask_id in subtask_ids:
+            if subtask_id not in task_dates:
+                continue
 
-                # Проверяем, что подзадача помещается в рамки родительской задачи
-                if subtask_start_date < parent_start_date:
-                    warning = f"Подзадача {subtask_id} начинается раньше родительской задачи {parent_id}"
-                    warnings.append(warning)
-                    print(f"⚠️ {warning}")
+            subtask_start_date, subtask_end_date = parsed[subtask_id]
+            if subtask_start_date is None or subtask_end_date is None:
+                continue
 
-                if subtask_end_date > parent_end_date:
-                    warning = f"Подзадача {subtask_id} заканчивается позже родительской задачи {parent_id}"
-                    warnings.append(warning)
-                    print(f"⚠️ {warning}")
+            # Проверяем, что подзадача помещается в рамки родительской задачи
+            if subtask_start_date < parent_start_date:
+                warning = f"Подзадача {subtask_id} начинается раньше родительской задачи {parent_id}"
+                warnings.append(warning)
+                logger.warning("⚠️ %s", warning)
 
-        except ValueError as e:
-            warning = f"Ошибка при проверке дат для родительской задачи {parent_id}: {str(e)}"
-            warnings.append(warning)
-            print(f"⚠️ {warning}")
+            if subtask_end_date > parent_end_date:
+                warning = f"Подзадача {subtask_id} заканчивается позже родительской задачи {parent_id}"
+                warnings.append(warning)
+                logger.warning("⚠️ %s", warning)
 
     # Проверяем логичность дат (начало <= конец)
     for task_id, dates in task_dates.items():
         start_date = dates.get('start')
         end_date = dates.get('end')
 
-        if start_date and end_date:
-            try:
-                start = datetime.datetime.strptime(start_date, '%Y-%m-%d')
-                end = datetime.datetime.strptime(end_date, '%Y-%m-%d')
+        if not start_date or not end_date:
+            continue
 
-                if start > end:
-                    warning = f"Задача {task_id}: дата начала ({start_date}) позже даты окончания ({end_date})"
-                    warnings.append(warning)
-                    print(f"⚠️ {warning}")
+        if task_id in parse_errors:
+            warning = f"Ошибка формата дат для задачи {task_id}: {parse_errors[task_id]}"
+            warnings.append(warning)
+            logger.warning("⚠️ %s", warning)
+            continue
 
-            except ValueError as e:
-                warning = f"Ошибка формата дат для задачи {task_id}: {str(e)}"
-                warnings.append(warning)
-                print(f"⚠️ {warning}")
+        start, end = parsed[task_id]
+        if start > end:
+            warning = f"Задача {task_id}: дата начала ({start_date}) позже даты окончания ({end_date})"
+            warnings.append(warning)
+            logger.warning("⚠️ %s", warning)
 
     if not warnings:
-        print("✅ Финальная проверка прошла успешно - проблем не найдено")
+        logger.debug("✅ Финальная проверка прошла успешно - проблем не найдено")
     else:
-        print(f"⚠️ Найдено {len(warnings)} предупреждений при финальной проверке")
+        logger.warning("⚠️ Найдено %s предупреждений при финальной проверке", len(warnings))
 
     return warnings
\ No newline at end of file
@@ -1,3 +1,12 @@
+import json
+import logging
+
+from data.config import Config
+from utils.employee_availability import clear_available_dates_cache
+
+logger = logging.getLogger(__name__)
+
+
 def disable_days_off_for_testing():
     """
     Временно отключает учет выходных дней у всех сотрудников для тестирования.
@@ -6,18 +15,17 @@ def disable_days_off_for_testing():
     для всех сотрудников, чтобы проверить расчет календарного плана без учета выходных.
 
     Returns:
-        list: Оригинальные данные о сотрудниках для последующего восстановления
+        list: Пары (ID сотрудника, исходный список выходных) для последующего восстановления
     """
-    from data.config import Config
-
-    # Сохраняем оригинальные данные
-    original_employees = [employee.copy() for employee in Config.EMPLOYEES]
+    # Сохраняем только изменяемое поле: сами списки выходных не изменяются,
+    # а заменяются новыми, поэтому копировать сотрудников целиком не нужно
+    original_employees = [(employee['id'], employee['days_off']) for employee in Config.EMPLOYEES]
 
     # Модифицируем данные - устанавливаем пустые списки выходных дней
     for employee in Config.EMPLOYEES:
         employee['days_off'] = []
 
-    print("ТЕСТОВЫЙ РЕЖИМ: Выходные дни сотрудников временно отключены для тестирования")
+    logger.info("ТЕСТОВЫЙ РЕЖИМ: Выходные дни сотрудников временно отключены для тестирования")
     return original_employees
 
 
@@ -26,37 +34,45 @@ def restore_days_off(original_employees):
     Восстанавливает оригинальные выходные дни сотрудников после тестирования.
 
     Args:
-        original_employees (list): Оригинальные данные о сотрудниках
+        original_employees (list): Результат disable_days_off_for_testing()
     """
-    from data.config import Config
-
-    # Восстанавливаем оригинальные данные
-    Config.EMPLOYEES = original_employees
+    # Восстанавливаем выходные в тех же словарях сотрудников, на которые
+    # могут ссылаться другие модули, вместо замены Config.EMPLOYEES
+    employees_by_id = {employee['id']: employee for employee in Config.EMPLOYEES}
+    for employee_id, days_off in original_employees:
+        employee = employees_by_id.get(employee_id)
+        if employee is not None:
+            employee['days_off'] = days_off
 
-    print("Восстановлены оригинальные данные о выходных днях сотрудников")
+    logger.info("Восстановлены оригинальные данные о выходных днях сотрудников")
 
 
-def update_employees_in_db(db_manager):
+def update_employees_in_db(db_manager, cursor=None):
     """
     Обновляет данные о сотрудниках в базе данных на основе текущих данных в Config.
 
     Args:
         db_manager: Менеджер базы данных
+        cursor: Курсор уже открытого соединения (опционально). Тогда запрос выполняется
+                в транзакции вызывающего кода, а фиксирует ее и закрывает соединение он сам
     """
-    from data.config import Config
-    import json
-
-    db_manager.connect()
-
-    try:
-        # Обновляем каждого сотрудника
-        for employee in Config.EMPLOYEES:
-            db_manager.cursor.execute(
-                "UPDATE employees SET days_off = ? WHERE id = ?",
-                (json.dumps(employee['days_off']), employee['id'])
-            )
-
-        db_manager.connection.commit()
-        print(f"Обновлены данные о выходных днях для {len(Config.EMPLOYEES)} сотрудников в базе данных")
-    finally:
-        db_manager.close()
\ No newline at end of file
+    # Обновляем всех сотрудников одним пакетным запросом в одной транзакции
+    rows = [(json.dumps(employee['days_off']), employee['id']) for employee in Config.EMPLOYEES]
+    query = "UPDATE employees SET days_off = ? WHERE id = ?"
+
+    if cursor is not None:
+        cursor.executemany(query, rows)
+    else:
+        db_manager.connect()
+        try:
+            # Служебное обновление: в режиме WAL достаточно синхронизации NORMAL
+            db_manager.cursor.execute("PRAGMA synchronous = NORMAL")
+            db_manager.cursor.executemany(query, rows)
+            db_manager.connection.commit()
+        finally:
+            db_manager.close()
+
+    logger.info("Обновлены данные о выходных днях для %s сотрудников в базе данных", len(rows))
+
+    # Маски рабочих дней и рассчитанные даты задач зависят от выходных - сбрасываем их
+    clear_available_dates_cache()
\ No newline at end of file